@@ -8,9 +8,13 @@ Data Sources (in priority order):
 All CMS data is cached for 24 hours.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+from fractions import Fraction
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.data.mock_data.hospitals import (
@@ -18,14 +22,24 @@ from app.data.mock_data.hospitals import (
     get_price_for_code,
     get_regional_stats,
     get_all_prices_for_code,
+    iter_prices_for_code,
 )
-from app.services.cms_data_service import get_cms_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _cms_service():
+    # Imported on first use so app startup doesn't pay for httpx and the CMS client
+    from app.services.cms_data_service import get_cms_service
+    return get_cms_service()
+
+
+# Number of other hospitals to show prices from for each line item
+MAX_OTHER_HOSPITALS = 5
+
+
 class LineItemInput(BaseModel):
     code: Optional[str]
     description: str
@@ -100,6 +114,65 @@ class CompareResponse(BaseModel):
     data_sources: List[str]  # Which data sources were used
 
 
+# Status bands as (billed / fair_price upper bound, status), checked in order.
+# Anything above the last band is "very_high".
+_CMS_THRESHOLDS = (
+    (1.0, "low"),
+    (1.5, "fair"),       # Within 50%
+    (2.0, "high"),       # 50-100% above
+)
+_MOCK_THRESHOLDS = (
+    (1.0, "low"),
+    (1.2, "fair"),       # Within 20%
+    (1.5, "high"),       # 20-50% above
+)
+_OVERCHARGED_STATUSES = ("high", "very_high")
+
+# Response data_sources labels, keyed by the CMS pricing field that backs them
+_CMS_SOURCE_LABELS = (
+    ("physician_fee", "CMS Medicare Physician Data"),
+    ("facility_fee", "CMS Medicare Outpatient Data"),
+    ("drug_pricing", "CMS Medicare Part B Drug Spending"),
+)
+_MOCK_SOURCE_LABEL = "Hospital Mock Data"
+
+# Overall bands as (savings share of total billed, assessment), checked in order.
+# Shares are exact fractions so the cent totals compare without floats.
+_OVERALL_THRESHOLDS = (
+    (Fraction(3, 10), "significantly_overcharged"),
+    (Fraction(3, 20), "moderately_overcharged"),
+    (Fraction(0), "slightly_overcharged"),
+)
+
+
+def _to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def _overall_assessment(savings_cents: int, billed_cents: int) -> str:
+    for share, assessment in _OVERALL_THRESHOLDS:
+        if savings_cents * share.denominator > billed_cents * share.numerator:
+            return assessment
+    return "fair"
+
+
+def _assess_against(billed: float, fair_price: float, thresholds: tuple) -> tuple:
+    """
+    Place billed amount into a status band relative to fair_price.
+    Returns (status, variance_percent, potential_savings, fair_price)
+    """
+    status = "very_high"
+    for multiplier, band in thresholds:
+        if billed <= fair_price * multiplier:
+            status = band
+            break
+
+    delta = billed - fair_price
+    variance = round(delta / fair_price * 100, 1)
+    savings = round(delta, 2) if status in _OVERCHARGED_STATUSES else 0
+    return (status, variance, savings, fair_price)
+
+
 def assess_price_cms(billed: float, cms_data: Optional[dict]) -> tuple:
     """
     Assess price using CMS Medicare data.
@@ -134,17 +207,7 @@ def assess_price_cms(billed: float, cms_data: Optional[dict]) -> tuple:
     if fair_price is None:
         return ("unknown", None, None, None)
 
-    # Assess the price
-    if billed <= fair_price:
-        return ("low", round((billed - fair_price) / fair_price * 100, 1), 0, fair_price)
-    elif billed <= fair_price * 1.5:  # Within 50%
-        return ("fair", round((billed - fair_price) / fair_price * 100, 1), 0, fair_price)
-    elif billed <= fair_price * 2.0:  # 50-100% above
-        return ("high", round((billed - fair_price) / fair_price * 100, 1),
-                round(billed - fair_price, 2), fair_price)
-    else:  # More than 100% above
-        return ("very_high", round((billed - fair_price) / fair_price * 100, 1),
-                round(billed - fair_price, 2), fair_price)
+    return _assess_against(billed, fair_price, _CMS_THRESHOLDS)
 
 
 def assess_price_mock(billed: float, gross_charge: Optional[float],
@@ -156,18 +219,7 @@ def assess_price_mock(billed: float, gross_charge: Optional[float],
     if gross_charge is None or negotiated_rate is None:
         return ("unknown", None, None, None)
 
-    fair_price = negotiated_rate
-
-    if billed <= fair_price:
-        return ("low", round((billed - fair_price) / fair_price * 100, 1), 0, fair_price)
-    elif billed <= fair_price * 1.2:  # Within 20%
-        return ("fair", round((billed - fair_price) / fair_price * 100, 1), 0, fair_price)
-    elif billed <= fair_price * 1.5:  # 20-50% above
-        return ("high", round((billed - fair_price) / fair_price * 100, 1),
-                round(billed - fair_price, 2), fair_price)
-    else:  # More than 50% above
-        return ("very_high", round((billed - fair_price) / fair_price * 100, 1),
-                round(billed - fair_price, 2), fair_price)
+    return _assess_against(billed, negotiated_rate, _MOCK_THRESHOLDS)
 
 
 def extract_cms_summary(cms_pricing: dict) -> Optional[CMSData]:
@@ -186,7 +238,6 @@ def extract_cms_summary(cms_pricing: dict) -> Optional[CMSData]:
     submitted_charge = None
     facility_payment = None
     description = None
-    data_source = []
     match_warning = None
 
     # Check for description mismatch warning
@@ -195,42 +246,49 @@ def extract_cms_summary(cms_pricing: dict) -> Optional[CMSData]:
 
     # Check drug pricing first (for J-codes, Q-codes)
     if drug:
+        asp_price = drug.get("asp_price")
         # For drugs, use avg_spending_per_unit as the primary price
-        medicare_payment = drug.get("avg_spending_per_unit") or drug.get("asp_price")
+        medicare_payment = drug.get("avg_spending_per_unit") or asp_price
         # Drug datasets don't have min/max in the same way
-        medicare_min = drug.get("asp_price")  # ASP is often the floor
-        medicare_max = None
+        medicare_min = asp_price  # ASP is often the floor
         description = drug.get("description")
-        if drug.get("brand_name"):
-            description = f"{description} ({drug.get('brand_name')})"
-        data_source.append("Medicare Part B Drug Spending (ASP)")
+        brand_name = drug.get("brand_name")
+        if brand_name:
+            description = f"{description} ({brand_name})"
 
     if physician:
-        mp = physician.get("medicare_payment", {})
+        mp = physician.get("medicare_payment") or {}
         if not medicare_payment:
             medicare_payment = mp.get("average")
         if not medicare_min:
             medicare_min = mp.get("min")
         if not medicare_max:
             medicare_max = mp.get("max")
-        sc = physician.get("submitted_charges", {})
+        sc = physician.get("submitted_charges")
         if sc:
             submitted_charge = sc.get("average")
         if not description:
             description = physician.get("description")
-        data_source.append("Medicare Physician Fee Schedule")
 
     if facility:
-        fp = facility.get("facility_payment", {})
-        facility_payment = fp.get("average")
+        facility_payment = (facility.get("facility_payment") or {}).get("average")
         if not description:
             description = facility.get("description")
-        data_source.append("Medicare Outpatient Hospital Data")
+
+    data_source = [
+        label
+        for label, present in (
+            ("Medicare Part B Drug Spending (ASP)", drug),
+            ("Medicare Physician Fee Schedule", physician),
+            ("Medicare Outpatient Hospital Data", facility),
+        )
+        if present
+    ]
 
     if not medicare_payment and not facility_payment:
         return None
 
-    return CMSData(
+    return CMSData.model_construct(
         medicare_avg_payment=medicare_payment,
         medicare_min_payment=medicare_min,
         medicare_max_payment=medicare_max,
@@ -242,67 +300,33 @@ def extract_cms_summary(cms_pricing: dict) -> Optional[CMSData]:
     )
 
 
-@router.post("/compare", response_model=CompareResponse)
-async def compare_charges(request: CompareRequest):
+class _LineItemComparer:
     """
-    Compare line items against CMS hospital price transparency data.
+    Builds LineItemComparison objects for one compare request.
 
-    Uses real CMS Medicare data when available, falls back to mock data.
-    All CMS data is cached for 24 hours.
+    Bills often repeat the same code across line items, and the CMS summary,
+    CMS assessment and other-hospital list are pure functions of their inputs,
+    so they are memoized for the lifetime of the request.
     """
-    hospital = get_hospital(request.hospital_id)
-    if not hospital:
-        raise HTTPException(status_code=404, detail="Hospital not found")
-
-    # Collect code-description pairs for batch CMS lookup with validation
-    code_desc_pairs = [
-        (item.code, item.description)
-        for item in request.line_items
-        if item.code
-    ]
-
-    # Fetch CMS data for all codes with description validation
-    cms_pricing_data = {}
-    data_sources_used = set()
-
-    if request.use_cms_data and code_desc_pairs:
-        try:
-            cms_service = get_cms_service()
-            cms_pricing_data = cms_service.get_pricing_for_codes(code_desc_pairs)
-            logger.info(f"Fetched CMS data for {len(cms_pricing_data)} codes")
 
-            # Track which data sources were used (only count reliable matches)
-            for code, data in cms_pricing_data.items():
-                if data.get("has_reliable_data", data.get("has_data")):
-                    if data.get("physician_fee"):
-                        data_sources_used.add("CMS Medicare Physician Data")
-                    if data.get("facility_fee"):
-                        data_sources_used.add("CMS Medicare Outpatient Data")
-                    if data.get("drug_pricing"):
-                        data_sources_used.add("CMS Medicare Part B Drug Spending")
-                elif data.get("has_data") and not data.get("has_reliable_data"):
-                    # Log when we skip data due to description mismatch
-                    match_info = data.get("description_match", {})
-                    logger.info(
-                        f"Skipped CMS data for {code} due to description mismatch: "
-                        f"{match_info.get('reason', 'unknown')}"
-                    )
-        except Exception as e:
-            logger.error(f"Failed to fetch CMS data: {e}")
-            # Continue with mock data
-
-    comparisons = []
-    total_billed = 0
-    total_fair_value = 0
-    total_potential_savings = 0
-    items_with_data = 0
-
-    for item in request.line_items:
-        total_billed += item.amount * item.quantity
+    def __init__(self, hospital_id: str, cms_pricing_data: Dict[str, dict], data_sources_used: set):
+        self.hospital_id = hospital_id
+        self.cms_pricing_data = cms_pricing_data
+        self.data_sources_used = data_sources_used
+        self.summary_cache: Dict[str, Optional[CMSData]] = {}
+        self.assessment_cache: Dict[Tuple[str, float], tuple] = {}
+        self.other_hospitals_cache: Dict[str, List[PriceComparison]] = {}
 
+    def compare(self, item: LineItemInput) -> Tuple[LineItemComparison, Optional[float]]:
+        """Returns (comparison, fair_price); fair_price is None when no data matched."""
         # Get CMS data if available
-        cms_pricing = cms_pricing_data.get(item.code) if item.code else None
-        cms_summary = extract_cms_summary(cms_pricing) if cms_pricing else None
+        cms_pricing = self.cms_pricing_data.get(item.code) if item.code else None
+        if not cms_pricing:
+            cms_summary = None
+        elif item.code in self.summary_cache:
+            cms_summary = self.summary_cache[item.code]
+        else:
+            cms_summary = self.summary_cache[item.code] = extract_cms_summary(cms_pricing)
 
         # Get mock data as fallback
         hospital_price = None
@@ -310,42 +334,46 @@ async def compare_charges(request: CompareRequest):
         other_hospitals = []
 
         if item.code:
-            hospital_price = get_price_for_code(request.hospital_id, item.code)
+            hospital_price = get_price_for_code(self.hospital_id, item.code)
             regional = get_regional_stats(item.code)
 
-            # Get prices from other hospitals (mock data)
-            all_prices = get_all_prices_for_code(item.code)
-            for price_info in all_prices:
-                if price_info["hospital"]["id"] != request.hospital_id:
-                    other_hospitals.append(PriceComparison(
+            # Get prices from other hospitals (mock data), built once per code
+            other_hospitals = self.other_hospitals_cache.get(item.code)
+            if other_hospitals is None:
+                other_hospitals = self.other_hospitals_cache[item.code] = [
+                    PriceComparison.model_construct(
                         hospital_name=price_info["hospital"]["name"],
                         gross_charge=price_info["price"]["gross_charge"],
                         negotiated_rate=price_info["price"]["negotiated_rate"],
-                    ))
+                    )
+                    for price_info in get_all_prices_for_code(
+                        item.code,
+                        exclude_id=self.hospital_id,
+                        limit=MAX_OTHER_HOSPITALS,
+                    )
+                ]
 
         # Assess the price - prefer CMS data (only if reliable), fall back to mock
         fair_price = None
         # Use has_reliable_data to skip mismatched descriptions (e.g., drug billed as surgery code)
         if cms_pricing and cms_pricing.get("has_reliable_data", cms_pricing.get("has_data")):
-            status, variance, savings, fair_price = assess_price_cms(item.amount, cms_pricing)
+            assessment_key = (item.code, item.amount)
+            if assessment_key not in self.assessment_cache:
+                self.assessment_cache[assessment_key] = assess_price_cms(item.amount, cms_pricing)
+            status, variance, savings, fair_price = self.assessment_cache[assessment_key]
         elif hospital_price:
             gross_charge = hospital_price["gross_charge"]
             negotiated_rate = hospital_price["negotiated_rate"]
             status, variance, savings, fair_price = assess_price_mock(
                 item.amount, gross_charge, negotiated_rate
             )
-            data_sources_used.add("Hospital Mock Data")
+            self.data_sources_used.add(_MOCK_SOURCE_LABEL)
         else:
             status, variance, savings = "unknown", None, None
 
-        # Track fair values
-        if fair_price is not None:
-            items_with_data += 1
-            total_fair_value += fair_price * item.quantity
-            if savings:
-                total_potential_savings += savings * item.quantity
-
-        comparisons.append(LineItemComparison(
+        # Response models are built from data we just produced, so skip validation
+        # (model_construct); only the inbound CompareRequest needs validating
+        comparison = LineItemComparison.model_construct(
             code=item.code,
             description=item.description,
             billed_amount=item.amount,
@@ -354,42 +382,136 @@ async def compare_charges(request: CompareRequest):
             cms_description=hospital_price["description"] if hospital_price else None,
             hospital_gross_charge=hospital_price["gross_charge"] if hospital_price else None,
             hospital_negotiated_rate=hospital_price["negotiated_rate"] if hospital_price else None,
-            regional_stats=RegionalStats(**regional) if regional else None,
+            regional_stats=RegionalStats.model_construct(**regional) if regional else None,
             status=status,
             variance_percent=variance,
             potential_savings=savings,
             other_hospitals=other_hospitals,
-        ))
+        )
+        return comparison, fair_price
+
+
+@router.post("/compare", response_model=CompareResponse)
+async def compare_charges(request: CompareRequest):
+    """
+    Compare line items against CMS hospital price transparency data.
+
+    Uses real CMS Medicare data when available, falls back to mock data.
+    All CMS data is cached for 24 hours.
+    """
+    hospital = get_hospital(request.hospital_id)
+    if not hospital:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+
+    # Fetch CMS data for all codes with description validation
+    cms_pricing_data = {}
+    data_sources_used = set()
+
+    code_desc_pairs = []
+    if request.use_cms_data:
+        from app.services.cms_data_service import HCPCS_CODE_RE
+
+        # Collect code-description pairs for batch CMS lookup with validation.
+        # One lookup per unique code, validated against its first description on
+        # the bill. Codes CMS can't know about (revenue codes, "misc", internal
+        # SKUs) go straight to the mock-data fallback.
+        first_descriptions: Dict[str, str] = {}
+        for item in request.line_items:
+            if item.code and HCPCS_CODE_RE.fullmatch(item.code.strip().upper()):
+                first_descriptions.setdefault(item.code, item.description)
+        code_desc_pairs = list(first_descriptions.items())
+
+    if code_desc_pairs:
+        try:
+            cms_service = _cms_service()
+            # Run the blocking CMS lookups off the event loop
+            cms_pricing_data = await asyncio.to_thread(
+                cms_service.get_pricing_for_codes, code_desc_pairs
+            )
+            logger.info(f"Fetched CMS data for {len(cms_pricing_data)} codes")
+
+            # Track which data sources were used (only count reliable matches)
+            for code, data in cms_pricing_data.items():
+                has_data = data.get("has_data")
+                reliable = data.get("has_reliable_data", has_data)
+                if reliable:
+                    data_sources_used.update(
+                        label for field, label in _CMS_SOURCE_LABELS if data.get(field)
+                    )
+                elif has_data:
+                    # Log when we skip data due to description mismatch
+                    match_info = data.get("description_match", {})
+                    logger.info(
+                        f"Skipped CMS data for {code} due to description mismatch: "
+                        f"{match_info.get('reason', 'unknown')}"
+                    )
+        except Exception as e:
+            logger.error(f"Failed to fetch CMS data: {e}")
+            # Continue with mock data
+
+    comparer = _LineItemComparer(request.hospital_id, cms_pricing_data, data_sources_used)
+    results = [comparer.compare(item) for item in request.line_items]
+    comparisons = [comparison for comparison, _ in results]
+
+    # Totals are accumulated in integer cents so sums don't drift
+    total_billed_cents = 0
+    total_fair_value_cents = 0
+    total_savings_cents = 0
+    items_with_data = 0
+
+    for item, (comparison, fair_price) in zip(request.line_items, results):
+        total_billed_cents += _to_cents(item.amount) * item.quantity
+        if fair_price is not None:
+            items_with_data += 1
+            total_fair_value_cents += _to_cents(fair_price) * item.quantity
+            if comparison.potential_savings:
+                total_savings_cents += _to_cents(comparison.potential_savings) * item.quantity
 
     # Overall assessment
     if items_with_data == 0:
         overall_assessment = "insufficient_data"
-    elif total_potential_savings > total_billed * 0.3:
-        overall_assessment = "significantly_overcharged"
-    elif total_potential_savings > total_billed * 0.15:
-        overall_assessment = "moderately_overcharged"
-    elif total_potential_savings > 0:
-        overall_assessment = "slightly_overcharged"
     else:
-        overall_assessment = "fair"
+        overall_assessment = _overall_assessment(total_savings_cents, total_billed_cents)
 
-    return CompareResponse(
+    return CompareResponse.model_construct(
         hospital_name=hospital["name"],
         hospital_id=request.hospital_id,
-        total_billed=round(total_billed, 2),
-        total_fair_value=round(total_fair_value, 2) if items_with_data > 0 else None,
-        total_potential_savings=round(total_potential_savings, 2) if total_potential_savings > 0 else None,
+        total_billed=total_billed_cents / 100,
+        total_fair_value=total_fair_value_cents / 100 if items_with_data > 0 else None,
+        total_potential_savings=total_savings_cents / 100 if total_savings_cents > 0 else None,
         overall_assessment=overall_assessment,
         line_items=comparisons,
         data_sources=list(data_sources_used) if data_sources_used else ["No matching data found"],
     )
 
 
+@router.get("/prices/{cpt_code}")
+async def stream_prices_for_code(cpt_code: str, exclude_hospital_id: Optional[str] = None):
+    """
+    Stream every hospital's price for a code as newline-delimited JSON.
+
+    Rows are serialized one at a time, so clients can start reading before the
+    full result set is assembled (matters once real price data replaces the mock).
+    """
+    async def rows() -> AsyncIterator[bytes]:
+        for price_info in iter_prices_for_code(cpt_code, exclude_hospital_id):
+            hospital = price_info["hospital"]
+            price = price_info["price"]
+            yield orjson.dumps({
+                "hospital_id": hospital["id"],
+                "hospital_name": hospital["name"],
+                "gross_charge": price["gross_charge"],
+                "negotiated_rate": price["negotiated_rate"],
+            }) + b"\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
 @router.get("/cache-stats")
 async def get_cache_stats():
     """Get CMS data cache statistics."""
     try:
-        cms_service = get_cms_service()
+        cms_service = _cms_service()
         return cms_service.get_cache_stats()
     except Exception as e:
         return {"error": str(e)}
@@ -399,7 +521,7 @@ async def get_cache_stats():
 async def clear_cache():
     """Clear the CMS data cache."""
     try:
-        cms_service = get_cms_service()
+        cms_service = _cms_service()
         cms_service.clear_cache()
         return {"status": "Cache cleared"}
     except Exception as e:
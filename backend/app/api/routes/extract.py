@@ -1,15 +1,15 @@
 import os
-from typing import Optional, List
+import time
+import asyncio
+from typing import Optional, List, Dict, Tuple
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.services.pdf_extractor import extract_bill_data
 from app.data.mock_data.hospitals import get_hospital
+from app.api.routes.upload import UPLOAD_DIR, FILE_ID_RE
 
 router = APIRouter()
 
-UPLOAD_DIR = "/tmp/billcheck_uploads"
-
 
 class ExtractRequest(BaseModel):
     file_id: str
@@ -32,17 +32,60 @@ class DetectedHospital(BaseModel):
 class ExtractResponse(BaseModel):
     line_items: List[LineItem]
     detected_hospital: Optional[DetectedHospital] = None
+    # True when the bill had more line items than the extractor keeps, so
+    # line_items (and any totals built from them) are partial
+    truncated: bool = False
+
+
+# Extraction results keyed by file_id. Uploads are named by their SHA-256,
+# so a re-uploaded bill is answered from here without re-parsing the PDF.
+EXTRACT_CACHE_TTL_SECONDS = 60 * 60
+_extract_cache: Dict[str, Tuple[float, ExtractResponse]] = {}
+
+
+def _get_cached_extraction(file_id: str) -> Optional[ExtractResponse]:
+    entry = _extract_cache.get(file_id)
+    if entry is None:
+        return None
+    cached_at, response = entry
+    if time.monotonic() - cached_at > EXTRACT_CACHE_TTL_SECONDS:
+        del _extract_cache[file_id]
+        return None
+    return response
+
+
+def _cache_extraction(file_id: str, response: ExtractResponse) -> None:
+    now = time.monotonic()
+    # Drop expired entries so the cache doesn't grow without bound
+    expired = [k for k, (t, _) in _extract_cache.items() if now - t > EXTRACT_CACHE_TTL_SECONDS]
+    for k in expired:
+        del _extract_cache[k]
+    _extract_cache[file_id] = (now, response)
 
 
 @router.post("/extract", response_model=ExtractResponse)
 async def extract_pdf(request: ExtractRequest):
+    # Anything that isn't an upload's id can't name a file (and must not be
+    # joined into a path)
+    if not FILE_ID_RE.fullmatch(request.file_id):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    cached = _get_cached_extraction(request.file_id)
+    if cached is not None:
+        return cached
+
     file_path = os.path.join(UPLOAD_DIR, f"{request.file_id}.pdf")
 
-    if not os.path.exists(file_path):
+    try:
+        os.stat(file_path)
+    except (OSError, ValueError):
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Extract bill data including hospital detection
-    bill_data = extract_bill_data(file_path)
+    # pdfplumber and the LLM client are heavy imports, so load them on first extract
+    from app.services.pdf_extractor import extract_bill_data
+
+    # Extract bill data including hospital detection (CPU-bound, keep it off the event loop)
+    bill_data = await asyncio.to_thread(extract_bill_data, file_path)
 
     # Build response
     line_items = [LineItem(**item) for item in bill_data["line_items"]]
@@ -66,7 +109,13 @@ async def extract_pdf(request: ExtractRequest):
             detected_name=hospital_info.get("detected_name"),
         )
 
-    return ExtractResponse(
+    response = ExtractResponse(
         line_items=line_items,
         detected_hospital=detected_hospital,
+        truncated=bill_data.get("truncated", False),
     )
+    # Fallback results (LLM error, unreadable bill) aren't cached, so a retry
+    # re-extracts instead of serving them for the whole TTL
+    if not bill_data.get("fallback"):
+        _cache_extraction(request.file_id, response)
+    return response
@@ -1,11 +1,33 @@
+import hashlib
+from functools import lru_cache
 from typing import List, Optional
-from fastapi import APIRouter, Query
+import orjson
+from fastapi import APIRouter, Query, Request, Response
 from pydantic import BaseModel
 
-from app.data.mock_data.hospitals import search_hospitals, HOSPITALS, get_hospital
+from app.data.mock_data.hospitals import search_hospitals, HOSPITALS
 
 router = APIRouter()
 
+# Hospital data is static for the life of the process, so one validator derived
+# from it covers every /hospitals URL (ETags are scoped per URL by clients)
+_HOSPITALS_ETAG = '"%s"' % hashlib.sha1(orjson.dumps(HOSPITALS, default=dict)).hexdigest()
+
+# Let browsers reuse hospital responses for an hour, then revalidate with the ETag
+_CACHE_HEADERS = {
+    "ETag": _HOSPITALS_ETAG,
+    "Cache-Control": "public, max-age=3600",
+}
+
+
+def _not_modified(request: Request) -> bool:
+    """True if the client's If-None-Match already holds the current ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or _HOSPITALS_ETAG in tags or f"W/{_HOSPITALS_ETAG}" in tags
+
 
 class Hospital(BaseModel):
     id: str
@@ -21,23 +43,49 @@ class HospitalListResponse(BaseModel):
     hospitals: List[Hospital]
 
 
-@router.get("/hospitals", response_model=HospitalListResponse)
-async def list_hospitals(search: Optional[str] = Query(None, description="Search query")):
-    """Search hospitals or list all if no search query provided."""
+# Hospital responses are static, so they are serialized to JSON bytes once and
+# returned as raw Responses (the response_model stays for the OpenAPI schema)
+_JSON = "application/json"
+_HOSPITAL_JSON = {h["id"]: orjson.dumps(Hospital(**h).model_dump()) for h in HOSPITALS}
+
+
+@lru_cache(maxsize=256)
+def _hospital_list_json(search: Optional[str]) -> bytes:
+    """Serialize (once per distinct query) the response for the static hospital list."""
     if search:
         results = search_hospitals(search)
     else:
         results = HOSPITALS
 
-    return HospitalListResponse(hospitals=[Hospital(**h) for h in results])
+    return orjson.dumps(HospitalListResponse(hospitals=[Hospital(**h) for h in results]).model_dump())
+
+
+def warm_up() -> None:
+    """Serialize the unfiltered hospital list ahead of the first request."""
+    _hospital_list_json(None)
+
+
+@router.get("/hospitals", response_model=HospitalListResponse)
+async def list_hospitals(
+    request: Request,
+    search: Optional[str] = Query(None, description="Search query"),
+):
+    """Search hospitals or list all if no search query provided."""
+    if _not_modified(request):
+        return Response(status_code=304, headers=_CACHE_HEADERS)
+
+    return Response(content=_hospital_list_json(search), media_type=_JSON, headers=_CACHE_HEADERS)
 
 
 @router.get("/hospitals/{hospital_id}", response_model=Hospital)
-async def get_hospital_by_id(hospital_id: str):
+async def get_hospital_by_id(hospital_id: str, request: Request):
     """Get a specific hospital by ID."""
-    hospital = get_hospital(hospital_id)
-    if not hospital:
+    body = _HOSPITAL_JSON.get(hospital_id)
+    if body is None:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    return Hospital(**hospital)
+    if _not_modified(request):
+        return Response(status_code=304, headers=_CACHE_HEADERS)
+
+    return Response(content=body, media_type=_JSON, headers=_CACHE_HEADERS)
@@ -1,13 +1,30 @@
+import contextlib
 import os
+import re
 import uuid
+import hashlib
+import aiofiles
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 
 router = APIRouter()
 
-# Store uploaded files temporarily
+# Store uploaded files temporarily (created at app startup, see app.main)
 UPLOAD_DIR = "/tmp/billcheck_uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Uploads are stored as <file_id>.pdf, where file_id is the SHA-256 hex digest
+# of the file's bytes
+FILE_ID_RE = re.compile(r"[0-9a-f]{64}")
+
+# Stream uploads to disk in fixed-size chunks so memory stays bounded
+CHUNK_SIZE = 1 << 20  # 1 MB
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024  # 100 MB
+
+
+def _private_opener(path: str, flags: int) -> int:
+    """Open uploads owner-only (bills contain patient data)."""
+    return os.open(path, flags, 0o600)
+
 
 class UploadResponse(BaseModel):
     file_id: str
@@ -18,11 +35,41 @@ async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+    # Check the magic bytes before touching the disk
+    first_chunk = await file.read(CHUNK_SIZE)
+    if not first_chunk.startswith(b"%PDF"):
+        raise HTTPException(status_code=400, detail="File is not a valid PDF")
+
+    # Stream to a scratch name, then store the file under its content hash so
+    # re-uploading the same bill maps to the same file_id (and extract cache)
+    tmp_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}.part")
+    digest = hashlib.sha256()
+
+    size = 0
+    chunk = first_chunk
+    try:
+        # Scratch names are UUIDs, so exclusive create ("x") never collides
+        async with aiofiles.open(tmp_path, "xb", opener=_private_opener) as f:
+            while chunk:
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="File too large")
+                digest.update(chunk)
+                await f.write(chunk)
+                chunk = await file.read(CHUNK_SIZE)
 
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+        file_id = digest.hexdigest()
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+        if os.path.exists(file_path):
+            # Same bytes already on disk
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        # Too large, disk full, client gone or request cancelled: don't leave
+        # the scratch file behind
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
 
     return UploadResponse(file_id=file_id, filename=file.filename)
@@ -1,12 +1,67 @@
+import os
+import sys
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes import upload, extract, hospitals, compare
+from app.data.mock_data.hospitals import CPT_DESCRIPTIONS, index_sizes
+
+logger = logging.getLogger(__name__)
+
+# Set CACHE_PREWARM=1 to load CMS pricing for the common codes at startup
+# instead of on the first bills that use them
+CACHE_PREWARM = os.environ.get("CACHE_PREWARM") == "1"
+
+
+async def _prewarm_cms_cache():
+    # Same lazy import as the compare routes, so the default startup doesn't
+    # build the CMS client
+    from app.services.cms_data_service import get_cms_service
+
+    try:
+        await asyncio.to_thread(get_cms_service().prewarm, CPT_DESCRIPTIONS)
+    except Exception as e:
+        logger.warning(f"CMS cache prewarm failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the upload directory once at startup rather than on module import
+    os.makedirs(upload.UPLOAD_DIR, exist_ok=True)
+
+    # Mock data indexes are built at import; prime the cached list response too,
+    # so the first request after a deploy doesn't pay for it
+    hospitals.warm_up()
+    logger.info(f"Hospital data indexes ready: {index_sizes()}")
+
+    # Runs in the background so startup doesn't wait on CMS
+    prewarm_task = asyncio.create_task(_prewarm_cms_cache()) if CACHE_PREWARM else None
+    yield
+    if prewarm_task:
+        prewarm_task.cancel()
+
+    # Release pooled CMS connections; a no-op if no request ever used CMS data
+    from app.services.cms_data_service import close_cms_service
+    close_cms_service()
+
+    # Stop the PDF page workers. Only look if extraction ever ran: importing
+    # the extractor here would load pdfplumber just to find no pool.
+    pdf_extractor = sys.modules.get("app.services.pdf_extractor")
+    if pdf_extractor is not None:
+        pdf_extractor.shutdown_page_pool()
+
 
 app = FastAPI(
     title="BillCheck API",
     description="Hospital bill sanity checker powered by CMS price transparency data",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -14,8 +69,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Frontend URL
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 # Register API routes
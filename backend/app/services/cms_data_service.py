@@ -10,16 +10,24 @@ Caching: All data is cached for 24 hours to reduce API load and improve performa
 """
 
 import os
+import re
 import json
 import time
 import logging
 import hashlib
-from typing import Optional, Dict, List, Any
-from datetime import datetime, timedelta
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Iterable, NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime
 from pathlib import Path
+from statistics import median_high
 from urllib.parse import urlencode
 
 import httpx
+import orjson
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +36,27 @@ logger = logging.getLogger(__name__)
 # Cache configuration
 CACHE_DIR = Path("/tmp/billcheck_cache")
 CACHE_EXPIRY_HOURS = 24
+CACHE_TTL_SECONDS = CACHE_EXPIRY_HOURS * 3600
+# Codes CMS has no data for are remembered for less time, in case it's added
+NEGATIVE_CACHE_TTL_SECONDS = 3600
+# Cached in place of a result when CMS answered but had nothing for the key.
+# Real results are never empty, so readers can tell the two apart by truthiness.
+_NO_DATA: Dict = {}
+# Entries kept in the in-process LRU in front of the file cache
+MEMORY_CACHE_SIZE = 2048
+
+# Maximum number of codes looked up concurrently in get_pricing_for_codes
+MAX_CONCURRENT_LOOKUPS = 10
+
+# Connection pool for the shared CMS client. Keep enough idle connections for
+# every concurrent lookup so a batch reuses TLS sessions instead of reconnecting.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=MAX_CONCURRENT_LOOKUPS * 2,
+    max_keepalive_connections=MAX_CONCURRENT_LOOKUPS,
+    keepalive_expiry=30.0,
+)
+HTTP_CONNECT_RETRIES = 2
+HTTP_HEADERS = {"User-Agent": "BillCheck/0.1"}
 
 # CMS API base URL
 CMS_DATA_API_BASE = "https://data.cms.gov/data-api/v1/dataset"
@@ -51,38 +80,87 @@ CODE_CROSSWALK = {
     "J2004": "J2001",  # Lidocaine with epinephrine
 }
 
+# HCPCS -> APC for services OPPS pays under a single APC (Addendum B), so the
+# outpatient facility fee can be looked up. Plain dict lookup; extend from the
+# current Addendum B as needed.
+HCPCS_TO_APC = {
+    "G0463": "5012",  # Hospital outpatient clinic visit
+    "99281": "5021",  # Type A emergency department visits, levels 1-5
+    "99282": "5022",
+    "99283": "5023",
+    "99284": "5024",
+    "99285": "5025",
+}
+
 # Keywords that indicate specific medical categories
 # Used for description matching to detect mismatched codes
-DRUG_KEYWORDS = {
+DRUG_KEYWORDS = frozenset({
     'injection', 'infusion', 'vaccine', 'medication', 'drug', 'dose',
     'mg', 'ml', 'mcg', 'units', 'per', 'vial', 'tablet', 'capsule',
     'ketamine', 'lidocaine', 'morphine', 'fentanyl', 'propofol', 'antibiotic',
     'steroid', 'anesthetic', 'sedation', 'analgesic', 'saline', 'dextrose',
-}
+})
 
-SURGERY_KEYWORDS = {
+SURGERY_KEYWORDS = frozenset({
     'incision', 'excision', 'resection', 'repair', 'removal', 'insertion',
     'implant', 'graft', 'transplant', 'amputation', 'biopsy', 'drainage',
     'reconstruction', 'revision', 'exploration', 'dissection', 'suture',
-}
+})
 
-BODY_PART_KEYWORDS = {
+BODY_PART_KEYWORDS = frozenset({
     'scrotum', 'scrotal', 'testis', 'testicle', 'penis', 'penile', 'prostate',
     'uterus', 'uterine', 'ovary', 'ovarian', 'vaginal', 'cervix', 'cervical',
     'breast', 'mammary', 'heart', 'cardiac', 'lung', 'pulmonary', 'liver',
     'hepatic', 'kidney', 'renal', 'brain', 'cerebral', 'spine', 'spinal',
     'knee', 'hip', 'shoulder', 'elbow', 'wrist', 'ankle', 'foot', 'hand',
-}
+})
+
+# Very common words excluded from the overlap score
+STOPWORDS = frozenset({'the', 'a', 'an', 'of', 'for', 'to', 'in', 'on', 'with', 'and', 'or', 'per'})
+
+
+# Shapes CMS datasets are keyed by: CPT (5 digits, or 4 digits plus a letter for
+# Category II/III) and HCPCS Level II (a letter plus 4 digits)
+HCPCS_CODE_RE = re.compile(r"\d{5}|\d{4}[A-Z]|[A-Z]\d{4}")
 
+# ASCII letter runs; punctuation and digits split words
+_WORD_RE = re.compile(r'[a-z]+')
 
-def _normalize_text(text: str) -> set:
-    """Normalize text to lowercase words for comparison."""
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str) -> frozenset:
+    """
+    Normalize text to lowercase words for comparison.
+
+    Bill and CMS descriptions repeat heavily across lookups, so results are
+    memoized; a full cache of short descriptions is roughly 2-3 MB. Returns a
+    frozenset so cached values can't be mutated by callers.
+    """
     if not text:
-        return set()
-    # Remove punctuation and split into words
-    import re
-    words = re.findall(r'[a-z]+', text.lower())
-    return set(words)
+        return frozenset()
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+class _DescriptionProfile(NamedTuple):
+    """Everything description matching needs from one description."""
+    words: frozenset
+    meaningful: frozenset  # words minus stopwords
+    is_drug: bool
+    is_surgery: bool
+    body_parts: frozenset
+
+
+@lru_cache(maxsize=4096)
+def _description_profile(text: str) -> _DescriptionProfile:
+    """Normalize a description and precompute its keyword categories (memoized)."""
+    words = _normalize_text(text)
+    return _DescriptionProfile(
+        words=words,
+        meaningful=words - STOPWORDS,
+        is_drug=not words.isdisjoint(DRUG_KEYWORDS),
+        is_surgery=not words.isdisjoint(SURGERY_KEYWORDS),
+        body_parts=words & BODY_PART_KEYWORDS,
+    )
 
 
 def _calculate_description_match(bill_desc: str, cms_desc: str) -> dict:
@@ -97,17 +175,17 @@ def _calculate_description_match(bill_desc: str, cms_desc: str) -> dict:
     if not bill_desc or not cms_desc:
         return {"score": 50, "match_type": "unknown", "reason": "Missing description"}
 
-    bill_words = _normalize_text(bill_desc)
-    cms_words = _normalize_text(cms_desc)
+    bill = _description_profile(bill_desc)
+    cms = _description_profile(cms_desc)
 
-    if not bill_words or not cms_words:
+    if not bill.words or not cms.words:
         return {"score": 50, "match_type": "unknown", "reason": "Empty description after normalization"}
 
     # Check for category mismatches (e.g., drug vs surgery)
-    bill_is_drug = bool(bill_words & DRUG_KEYWORDS)
-    cms_is_drug = bool(cms_words & DRUG_KEYWORDS)
-    bill_is_surgery = bool(bill_words & SURGERY_KEYWORDS)
-    cms_is_surgery = bool(cms_words & SURGERY_KEYWORDS)
+    bill_is_drug = bill.is_drug
+    cms_is_drug = cms.is_drug
+    bill_is_surgery = bill.is_surgery
+    cms_is_surgery = cms.is_surgery
 
     # Major category mismatch: bill says drug but CMS says surgery (or vice versa)
     if bill_is_drug and cms_is_surgery and not cms_is_drug:
@@ -124,31 +202,30 @@ def _calculate_description_match(bill_desc: str, cms_desc: str) -> dict:
         }
 
     # Check for body part mismatches in surgical codes
-    bill_body_parts = bill_words & BODY_PART_KEYWORDS
-    cms_body_parts = cms_words & BODY_PART_KEYWORDS
+    bill_body_parts = bill.body_parts
+    cms_body_parts = cms.body_parts
 
-    if bill_body_parts and cms_body_parts and not (bill_body_parts & cms_body_parts):
+    if bill_body_parts and cms_body_parts and bill_body_parts.isdisjoint(cms_body_parts):
         # Both mention body parts but they don't overlap
         return {
             "score": 15,
             "match_type": "category_mismatch",
-            "reason": f"Body part mismatch: bill mentions {bill_body_parts}, CMS mentions {cms_body_parts}"
+            "reason": f"Body part mismatch: bill mentions {set(bill_body_parts)}, CMS mentions {set(cms_body_parts)}"
         }
 
     # Calculate word overlap
-    common_words = bill_words & cms_words
-    # Exclude very common words
-    stopwords = {'the', 'a', 'an', 'of', 'for', 'to', 'in', 'on', 'with', 'and', 'or', 'per'}
-    meaningful_common = common_words - stopwords
-    meaningful_bill = bill_words - stopwords
-    meaningful_cms = cms_words - stopwords
+    meaningful_bill = bill.meaningful
+    meaningful_cms = cms.meaningful
 
     if not meaningful_bill or not meaningful_cms:
         return {"score": 50, "match_type": "unknown", "reason": "No meaningful words to compare"}
 
-    # Jaccard similarity on meaningful words
-    union_size = len(meaningful_bill | meaningful_cms)
-    overlap_score = len(meaningful_common) / union_size if union_size > 0 else 0
+    # Jaccard similarity on meaningful words. The union size follows from the
+    # intersection (len(a | b) == len(a) + len(b) - len(a & b)), so only one
+    # set is built, and it can't be zero once both sides are non-empty
+    meaningful_common = meaningful_bill & meaningful_cms
+    union_size = len(meaningful_bill) + len(meaningful_cms) - len(meaningful_common)
+    overlap_score = len(meaningful_common) / union_size
 
     # Convert to 0-100 scale
     score = int(overlap_score * 100)
@@ -165,12 +242,84 @@ def _calculate_description_match(bill_desc: str, cms_desc: str) -> dict:
         return {"score": score, "match_type": "mismatch", "reason": f"No common terms found between descriptions"}
 
 
+# (epoch second, ISO string) of the last cached_at stamp; swapped as one tuple so
+# threads in the lookup pool never see a half-updated pair
+_last_stamp: Tuple[int, str] = (0, "")
+
+
+def _cached_at() -> str:
+    """
+    ISO timestamp for a record's cached_at field, at one-second resolution.
+
+    A batch of lookups stamps several records within the same second, so the
+    string is formatted once per second and reused.
+    """
+    global _last_stamp
+    second = int(time.time())
+    if _last_stamp[0] != second:
+        _last_stamp = (second, datetime.fromtimestamp(second).isoformat())
+    return _last_stamp[1]
+
+
+def _safe_float(value: Any) -> Optional[float]:
+    """Safely convert a value to float."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _positive_values(records: List[Dict], field: str) -> List[float]:
+    """Parse field from each record, keeping only values that are numeric and > 0."""
+    values = []
+    for record in records:
+        value = record.get(field)
+        if value is None:
+            continue
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            continue
+        if value > 0:
+            values.append(value)
+    return values
+
+
+def _summarize(values: List[float]) -> Dict:
+    """min/max/median/average/count of a non-empty list; median is the upper median."""
+    return {
+        "min": min(values),
+        "max": max(values),
+        "median": median_high(values),
+        "average": sum(values) / len(values),
+        "count": len(values),
+    }
+
+
 class CMSDataService:
     """Service for fetching and caching CMS Medicare pricing data."""
 
     def __init__(self):
-        self.client = httpx.Client(timeout=30.0)
+        # HTTP/2 lets concurrent lookups multiplex over one connection to data.cms.gov
+        self.client = httpx.Client(
+            timeout=30.0,
+            headers=HTTP_HEADERS,
+            transport=httpx.HTTPTransport(
+                http2=True, limits=HTTP_LIMITS, retries=HTTP_CONNECT_RETRIES
+            ),
+        )
+        # In-memory LRU over the file cache: cache_key -> (expires_at, data).
+        # Shared by the lookup threads, hence the lock.
+        self._mem_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        # Cache paths are built as plain strings on every read/write
+        self._cache_dir = str(CACHE_DIR)
         self._ensure_cache_dir()
+        # Closes the client when the service is collected (or at interpreter
+        # exit) without relying on __del__ running while modules tear down
+        self._finalizer = weakref.finalize(self, self.client.close)
 
     def _ensure_cache_dir(self):
         """Create cache directory if it doesn't exist."""
@@ -179,44 +328,89 @@ class CMSDataService:
     def _get_cache_key(self, *args) -> str:
         """Generate a cache key from arguments."""
         key_str = ":".join(str(a) for a in args)
-        return hashlib.md5(key_str.encode()).hexdigest()
+        # Keys aren't security-sensitive; a 64-bit blake2b is cheaper than md5
+        # and gives shorter file names
+        return hashlib.blake2b(key_str.encode(), digest_size=8).hexdigest()
 
-    def _get_cache_path(self, cache_key: str) -> Path:
+    def _get_cache_path(self, cache_key: str) -> str:
         """Get the file path for a cache key."""
-        return CACHE_DIR / f"{cache_key}.json"
-
-    def _is_cache_valid(self, cache_path: Path) -> bool:
-        """Check if cache file exists and is not expired."""
-        if not cache_path.exists():
-            return False
+        return f"{self._cache_dir}/{cache_key}.json"
 
-        # Check if file is older than 24 hours
-        mtime = datetime.fromtimestamp(cache_path.stat().st_mtime)
-        expiry_time = datetime.now() - timedelta(hours=CACHE_EXPIRY_HOURS)
-        return mtime > expiry_time
+    def _remember(self, cache_key: str, expires_at: float, data: Any):
+        """Store an entry in the in-memory LRU, evicting the oldest if full."""
+        with self._mem_lock:
+            self._mem_cache[cache_key] = (expires_at, data)
+            self._mem_cache.move_to_end(cache_key)
+            if len(self._mem_cache) > MEMORY_CACHE_SIZE:
+                self._mem_cache.popitem(last=False)
 
     def _read_cache(self, cache_key: str) -> Optional[Any]:
-        """Read data from cache if valid."""
-        cache_path = self._get_cache_path(cache_key)
-        if self._is_cache_valid(cache_path):
-            try:
-                with open(cache_path, "r") as f:
-                    data = json.load(f)
-                    logger.info(f"Cache hit for key: {cache_key[:8]}...")
+        """
+        Read data from cache if valid.
+
+        Checks the in-memory LRU first, then the file cache. Returned objects are
+        shared between callers, so treat them as read-only. A negative entry
+        comes back as an empty dict (see _write_negative_cache).
+        """
+        now = time.time()
+        with self._mem_lock:
+            entry = self._mem_cache.get(cache_key)
+            if entry is not None:
+                expires_at, data = entry
+                if now < expires_at:
+                    self._mem_cache.move_to_end(cache_key)
                     return data
-            except (json.JSONDecodeError, IOError) as e:
-                logger.warning(f"Failed to read cache: {e}")
-        return None
+                del self._mem_cache[cache_key]
+
+        cache_path = self._get_cache_path(cache_key)
+        try:
+            mtime = os.stat(cache_path).st_mtime
+        except OSError:
+            return None
+        expires_at = mtime + CACHE_TTL_SECONDS
+        if expires_at <= now:
+            return None
+
+        try:
+            with open(cache_path, "rb") as f:
+                data = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to read cache: {e}")
+            return None
 
-    def _write_cache(self, cache_key: str, data: Any):
+        if not data:
+            # Negative entry; these expire sooner
+            expires_at = mtime + NEGATIVE_CACHE_TTL_SECONDS
+            if expires_at <= now:
+                return None
+
+        logger.info(f"Cache hit for key: {cache_key[:8]}...")
+        self._remember(cache_key, expires_at, data)
+        return data
+
+    def _write_cache(self, cache_key: str, data: Any, ttl: float = CACHE_TTL_SECONDS):
         """Write data to cache."""
         cache_path = self._get_cache_path(cache_key)
+        # Write to a per-thread temp file and rename it into place so concurrent
+        # readers (other threads or workers) never see a partially written file
+        tmp_path = f"{self._cache_dir}/{cache_key}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with open(cache_path, "w") as f:
-                json.dump(data, f)
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp_path, cache_path)
             logger.info(f"Cached data with key: {cache_key[:8]}...")
         except IOError as e:
             logger.warning(f"Failed to write cache: {e}")
+        self._remember(cache_key, time.time() + ttl, data)
+
+    def _write_negative_cache(self, cache_key: str):
+        """
+        Remember that CMS returned no usable data for this key.
+
+        Only call this after CMS answered. A failed request must not be cached,
+        or a network blip would hide a code's pricing for an hour.
+        """
+        self._write_cache(cache_key, _NO_DATA, ttl=NEGATIVE_CACHE_TTL_SECONDS)
 
     def _fetch_from_cms(self, dataset_id: str, filters: Optional[Dict] = None,
                         size: int = 500, offset: int = 0) -> Optional[List[Dict]]:
@@ -241,7 +435,40 @@ class CMSDataService:
                 params[f"filter[{field}]"] = value
 
         url = f"{CMS_DATA_API_BASE}/{dataset_id}/data?{urlencode(params)}"
+        return self._get_records(url)
 
+    def _fetch_from_cms_multi(self, dataset_id: str, field: str, values: List[str],
+                              size: int = 5000) -> Optional[List[Dict]]:
+        """
+        Fetch all records whose field is any of values, in one filtered query.
+
+        Uses the CMS array filter (operator IN) and pages through the results
+        until a short page, so N codes cost one round trip instead of N.
+
+        Returns:
+            List of records or None if a request fails
+        """
+        base_params = [
+            ("filter[codes][condition][path]", field),
+            ("filter[codes][condition][operator]", "IN"),
+        ]
+        base_params.extend(("filter[codes][condition][value][]", value) for value in values)
+        size = min(size, 5000)
+
+        records: List[Dict] = []
+        offset = 0
+        while True:
+            params = base_params + [("size", size), ("offset", offset)]
+            page = self._get_records(f"{CMS_DATA_API_BASE}/{dataset_id}/data?{urlencode(params)}")
+            if page is None:
+                return None
+            records.extend(page)
+            if len(page) < size:
+                return records
+            offset += size
+
+    def _get_records(self, url: str) -> Optional[List[Dict]]:
+        """GET a CMS Data API URL and decode the JSON record list."""
         try:
             logger.info(f"Fetching from CMS: {url}")
             response = self.client.get(url)
@@ -266,7 +493,7 @@ class CMSDataService:
         cache_key = self._get_cache_key("pfs", hcpcs_code)
         cached = self._read_cache(cache_key)
         if cached is not None:
-            return cached
+            return cached or None
 
         # Query CMS data - field name is HCPCS_Cd
         data = self._fetch_from_cms(
@@ -275,7 +502,7 @@ class CMSDataService:
             size=500
         )
 
-        if not data:
+        if data is None:
             return None
 
         # Aggregate the data
@@ -283,6 +510,8 @@ class CMSDataService:
 
         if result:
             self._write_cache(cache_key, result)
+        else:
+            self._write_negative_cache(cache_key)
 
         return result
 
@@ -291,51 +520,22 @@ class CMSDataService:
         if not records:
             return None
 
-        # Extract payment amounts
-        payments = []
-        submitted_charges = []
-        description = None
-
-        for record in records:
-            # Field names from CMS dataset
-            payment = self._safe_float(record.get("Avg_Mdcr_Pymt_Amt"))
-            charge = self._safe_float(record.get("Avg_Sbmtd_Chrg"))
-
-            if payment and payment > 0:
-                payments.append(payment)
-            if charge and charge > 0:
-                submitted_charges.append(charge)
-
-            # Get description from first record that has one
-            if not description:
-                description = record.get("HCPCS_Desc")
-
+        # Extract payment amounts (field names from CMS dataset)
+        payments = _positive_values(records, "Avg_Mdcr_Pymt_Amt")
         if not payments:
             return None
 
-        # Calculate statistics
-        payments.sort()
-        charges_sorted = sorted(submitted_charges) if submitted_charges else []
+        submitted_charges = _positive_values(records, "Avg_Sbmtd_Chrg")
+        # Get description from first record that has one
+        description = next((r["HCPCS_Desc"] for r in records if r.get("HCPCS_Desc")), None)
 
         return {
             "hcpcs_code": hcpcs_code,
             "description": description or f"Service {hcpcs_code}",
-            "medicare_payment": {
-                "min": min(payments),
-                "max": max(payments),
-                "median": payments[len(payments) // 2],
-                "average": sum(payments) / len(payments),
-                "count": len(payments),
-            },
-            "submitted_charges": {
-                "min": min(charges_sorted) if charges_sorted else None,
-                "max": max(charges_sorted) if charges_sorted else None,
-                "median": charges_sorted[len(charges_sorted) // 2] if charges_sorted else None,
-                "average": sum(charges_sorted) / len(charges_sorted) if charges_sorted else None,
-                "count": len(charges_sorted),
-            } if charges_sorted else None,
+            "medicare_payment": _summarize(payments),
+            "submitted_charges": _summarize(submitted_charges) if submitted_charges else None,
             "data_source": "CMS Medicare Physician & Other Practitioners",
-            "cached_at": datetime.now().isoformat(),
+            "cached_at": _cached_at(),
         }
 
     def get_outpatient_fee_by_apc(self, apc_code: str) -> Optional[Dict]:
@@ -348,7 +548,7 @@ class CMSDataService:
         cache_key = self._get_cache_key("opps_apc", apc_code)
         cached = self._read_cache(cache_key)
         if cached is not None:
-            return cached
+            return cached or None
 
         # Query CMS data - field name is APC_Cd
         data = self._fetch_from_cms(
@@ -357,13 +557,15 @@ class CMSDataService:
             size=500
         )
 
-        if not data:
+        if data is None:
             return None
 
         result = self._aggregate_outpatient_data(apc_code, data)
 
         if result:
             self._write_cache(cache_key, result)
+        else:
+            self._write_negative_cache(cache_key)
 
         return result
 
@@ -372,47 +574,20 @@ class CMSDataService:
         if not records:
             return None
 
-        payments = []
-        charges = []
-        description = None
-
-        for record in records:
-            payment = self._safe_float(record.get("Avg_Mdcr_Pymt_Amt"))
-            charge = self._safe_float(record.get("Avg_Tot_Sbmtd_Chrgs"))
-
-            if payment and payment > 0:
-                payments.append(payment)
-            if charge and charge > 0:
-                charges.append(charge)
-
-            if not description:
-                description = record.get("APC_Desc")
-
+        payments = _positive_values(records, "Avg_Mdcr_Pymt_Amt")
         if not payments:
             return None
 
-        payments.sort()
-        charges_sorted = sorted(charges) if charges else []
+        charges = _positive_values(records, "Avg_Tot_Sbmtd_Chrgs")
+        description = next((r["APC_Desc"] for r in records if r.get("APC_Desc")), None)
 
         return {
             "code": code,
             "description": description or f"Service {code}",
-            "facility_payment": {
-                "min": min(payments),
-                "max": max(payments),
-                "median": payments[len(payments) // 2],
-                "average": sum(payments) / len(payments),
-                "count": len(payments),
-            },
-            "facility_charges": {
-                "min": min(charges_sorted) if charges_sorted else None,
-                "max": max(charges_sorted) if charges_sorted else None,
-                "median": charges_sorted[len(charges_sorted) // 2] if charges_sorted else None,
-                "average": sum(charges_sorted) / len(charges_sorted) if charges_sorted else None,
-                "count": len(charges_sorted),
-            } if charges_sorted else None,
+            "facility_payment": _summarize(payments),
+            "facility_charges": _summarize(charges) if charges else None,
             "data_source": "CMS Medicare Outpatient Hospitals",
-            "cached_at": datetime.now().isoformat(),
+            "cached_at": _cached_at(),
         }
 
     def get_drug_pricing(self, hcpcs_code: str) -> Optional[Dict]:
@@ -424,7 +599,7 @@ class CMSDataService:
         cache_key = self._get_cache_key("drug", hcpcs_code)
         cached = self._read_cache(cache_key)
         if cached is not None:
-            return cached
+            return cached or None
 
         # Try the code directly first
         data = self._fetch_from_cms(
@@ -432,6 +607,7 @@ class CMSDataService:
             filters={"HCPCS_Cd": hcpcs_code},
             size=10
         )
+        lookup_failed = data is None
 
         # If no data found, try crosswalk to older code
         if not data and hcpcs_code in CODE_CROSSWALK:
@@ -442,17 +618,56 @@ class CMSDataService:
                 filters={"HCPCS_Cd": old_code},
                 size=10
             )
+            lookup_failed = lookup_failed or data is None
 
         if not data:
+            if not lookup_failed:
+                self._write_negative_cache(cache_key)
             return None
 
         result = self._process_drug_data(hcpcs_code, data)
 
         if result:
             self._write_cache(cache_key, result)
+        else:
+            self._write_negative_cache(cache_key)
 
         return result
 
+    def _prefetch_drug_pricing(self, hcpcs_codes: List[str]):
+        """
+        Batch-load Part B drug pricing for codes that aren't cached yet.
+
+        One IN-filtered query (covering crosswalk codes too) replaces a request
+        per code; each code's result is written to the same cache entry that
+        get_drug_pricing reads. The batch covers crosswalk codes too, so a code
+        missing from a successful batch has no data and is cached as such.
+        """
+        pending = [
+            code for code in hcpcs_codes
+            if self._read_cache(self._get_cache_key("drug", code)) is None
+        ]
+        if len(pending) < 2:
+            return
+
+        values = set(pending)
+        values.update(CODE_CROSSWALK[code] for code in pending if code in CODE_CROSSWALK)
+        records = self._fetch_from_cms_multi(DATASETS["part_b_drugs"], "HCPCS_Cd", sorted(values))
+        if records is None:
+            return
+
+        records_by_code: Dict[str, List[Dict]] = {}
+        for record in records:
+            records_by_code.setdefault(record.get("HCPCS_Cd"), []).append(record)
+
+        for code in pending:
+            code_records = records_by_code.get(code) or records_by_code.get(CODE_CROSSWALK.get(code))
+            result = self._process_drug_data(code, code_records) if code_records else None
+            if result:
+                self._write_cache(self._get_cache_key("drug", code), result)
+            else:
+                self._write_negative_cache(self._get_cache_key("drug", code))
+
     def _process_drug_data(self, hcpcs_code: str, records: List[Dict]) -> Optional[Dict]:
         """Process drug pricing data from Part B Drug Spending dataset."""
         if not records:
@@ -461,8 +676,8 @@ class CMSDataService:
         # Use the first record (usually there's one per drug)
         record = records[0]
 
-        asp_price = self._safe_float(record.get("Avg_DY23_ASP_Price"))
-        avg_spending = self._safe_float(record.get("Avg_Spndng_Per_Dsg_Unt_2023"))
+        asp_price = _safe_float(record.get("Avg_DY23_ASP_Price"))
+        avg_spending = _safe_float(record.get("Avg_Spndng_Per_Dsg_Unt_2023"))
 
         if not asp_price and not avg_spending:
             return None
@@ -475,19 +690,25 @@ class CMSDataService:
             "generic_name": record.get("Gnrc_Name"),
             "asp_price": asp_price,
             "avg_spending_per_unit": avg_spending,
-            "total_claims_2023": self._safe_float(record.get("Tot_Clms_2023")),
-            "total_beneficiaries_2023": self._safe_float(record.get("Tot_Benes_2023")),
+            "total_claims_2023": _safe_float(record.get("Tot_Clms_2023")),
+            "total_beneficiaries_2023": _safe_float(record.get("Tot_Benes_2023")),
             "data_source": "CMS Medicare Part B Drug Spending",
-            "cached_at": datetime.now().isoformat(),
+            "cached_at": _cached_at(),
         }
 
+    def _has_answer(self, *key_parts) -> bool:
+        """
+        Whether CMS answered the lookup cached under key_parts.
+
+        Getters return None both when CMS has no data and when the request
+        failed; only the former leaves a (negative) cache entry behind.
+        """
+        return self._read_cache(self._get_cache_key(*key_parts)) is not None
+
     def _is_drug_code(self, hcpcs_code: str) -> bool:
         """Check if a code is likely a drug code (J, Q, or similar prefix)."""
-        if not hcpcs_code:
-            return False
-        prefix = hcpcs_code[0].upper()
         # J-codes are drugs, Q-codes often include drugs/biologicals
-        return prefix in ('J', 'Q')
+        return bool(hcpcs_code) and hcpcs_code[0] in "JjQq"
 
     def get_combined_pricing(self, hcpcs_code: str, bill_description: str = None) -> Dict:
         """
@@ -500,30 +721,47 @@ class CMSDataService:
         Returns physician fee, facility fee, and/or drug pricing depending on code type.
         Includes description match validation when bill_description is provided.
         """
-        # Use a different cache key when we have a bill description to validate
-        cache_suffix = "_validated" if bill_description else ""
-        cache_key = self._get_cache_key(f"combined_v3{cache_suffix}", hcpcs_code)
+        # Validated results depend on the bill description, but only through its
+        # normalized words, so key them by (code, words) and reuse them for
+        # re-processed bills and equivalent descriptions
+        if bill_description:
+            description_key = " ".join(sorted(_normalize_text(bill_description)))
+            cache_key = self._get_cache_key("combined_v5_validated", hcpcs_code, description_key)
+        else:
+            cache_key = self._get_cache_key("combined_v4", hcpcs_code)
 
-        # Only use cache if we don't have a bill description to validate
-        # (cached results might not have been validated against this specific description)
-        if not bill_description:
-            cached = self._read_cache(cache_key)
-            if cached is not None:
-                return cached
+        cached = self._read_cache(cache_key)
+        if cached is not None:
+            return cached
 
         physician_data = None
+        facility_data = None
         drug_data = None
         description_match = None
+        # Set when a source lookup failed (rather than CMS having no data), so
+        # a result missing that source isn't cached as if it were complete
+        lookup_failed = False
 
         # Check if this is a drug code
         if self._is_drug_code(hcpcs_code):
             # For drug codes, query the Part B Drug Spending dataset
             drug_data = self.get_drug_pricing(hcpcs_code)
+            if drug_data is None and not self._has_answer("drug", hcpcs_code):
+                lookup_failed = True
         else:
             # For non-drug codes, query the Physician Fee Schedule
             physician_data = self.get_physician_fee_by_hcpcs(hcpcs_code)
-
-        # Validate description match if we have a bill description
+            if physician_data is None and not self._has_answer("pfs", hcpcs_code):
+                lookup_failed = True
+            # and the facility fee when the code maps to an APC
+            apc_code = HCPCS_TO_APC.get(hcpcs_code)
+            if apc_code:
+                facility_data = self.get_outpatient_fee_by_apc(apc_code)
+                if facility_data is None and not self._has_answer("opps_apc", apc_code):
+                    lookup_failed = True
+
+        # Validate description match if we have a bill description. APC
+        # descriptions name a group of services, so they aren't used here.
         cms_description = None
         if physician_data:
             cms_description = physician_data.get("description")
@@ -543,7 +781,8 @@ class CMSDataService:
 
         # Determine if data should be trusted
         has_reliable_data = False
-        if physician_data is not None or drug_data is not None:
+        has_data = physician_data is not None or facility_data is not None or drug_data is not None
+        if has_data:
             if description_match is None:
                 # No validation requested, trust the data
                 has_reliable_data = True
@@ -558,17 +797,16 @@ class CMSDataService:
         result = {
             "hcpcs_code": hcpcs_code,
             "physician_fee": physician_data,
-            "facility_fee": None,  # Would need APC code mapping
+            "facility_fee": facility_data,
             "drug_pricing": drug_data,
-            "has_data": physician_data is not None or drug_data is not None,
+            "has_data": has_data,
             "has_reliable_data": has_reliable_data,
             "description_match": description_match,
-            "cached_at": datetime.now().isoformat(),
+            "cached_at": _cached_at(),
         }
 
-        # Only cache if we have some data and didn't do validation
-        # (validated results depend on the specific bill description)
-        if result["has_data"] and not bill_description:
+        # Only cache if we have some data, and all of what CMS has for the code
+        if result["has_data"] and not lookup_failed:
             self._write_cache(cache_key, result)
 
         return result
@@ -583,6 +821,12 @@ class CMSDataService:
         Returns a dictionary mapping code -> pricing data with match validation.
         """
         results = {}
+        # normalized code -> description; a repeated code keeps its last
+        # description, as the result for it would have before, and is only
+        # looked up once
+        lookups: Dict[str, Optional[str]] = {}
+        # normalized code -> the spellings callers passed, which key the results
+        requested_as: Dict[str, Dict[str, None]] = {}
         for item in code_description_pairs:
             # Handle both old format (just codes) and new format (code, description tuples)
             if isinstance(item, tuple):
@@ -591,9 +835,14 @@ class CMSDataService:
                 code, description = item, None
 
             if code:
+                # CMS codes are upper case; bills and OCR aren't always
+                normalized = code.strip().upper()
+                if not normalized:
+                    continue
+
                 # Skip revenue codes (typically 4 digits starting with 0)
                 # These aren't in the HCPCS/CPT datasets
-                if len(code) == 4 and code.startswith('0'):
+                if len(normalized) == 4 and normalized.startswith('0'):
                     logger.info(f"Skipping revenue code: {code}")
                     results[code] = {
                         "hcpcs_code": code,
@@ -603,13 +852,71 @@ class CMSDataService:
                     }
                     continue
 
-                results[code] = self.get_combined_pricing(code, description)
+                # Anything else shaped unlike a HCPCS/CPT code can't be in the
+                # datasets, so don't spend a cache lookup or CMS call on it
+                if not HCPCS_CODE_RE.fullmatch(normalized):
+                    results[code] = {
+                        "hcpcs_code": code,
+                        "has_data": False,
+                        "has_reliable_data": False,
+                        "note": "Not a HCPCS/CPT code"
+                    }
+                    continue
+
+                lookups[normalized] = description
+                requested_as.setdefault(normalized, {})[code] = None
+
+        if not lookups:
+            return results
+
+        # Drug rows are one per code, so their lookups collapse into a single
+        # batched query. Physician lookups stay per code: each takes a 500-row
+        # sample per code, which an IN query can't bound without pulling every
+        # provider row for common codes.
+        drug_codes = [code for code in lookups if self._is_drug_code(code)]
+
+        # Each lookup is I/O-bound (cache file or CMS HTTP call), so fan them out
+        # over a bounded thread pool; httpx.Client is safe to share across threads.
+        # Physician lookups start alongside the drug batch; only drug lookups
+        # wait for it, so they read what it cached.
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_LOOKUPS, len(lookups))) as pool:
+            prefetch = pool.submit(self._prefetch_drug_pricing, drug_codes)
+            pending = {
+                code: pool.submit(self.get_combined_pricing, code, description)
+                for code, description in lookups.items()
+                if not self._is_drug_code(code)
+            }
+            prefetch.result()
+            for code in drug_codes:
+                pending[code] = pool.submit(self.get_combined_pricing, code, lookups[code])
+
+            for normalized in lookups:
+                result = pending[normalized].result()
+                for code in requested_as[normalized]:
+                    results[code] = result
 
         return results
 
+    def prewarm(self, hcpcs_codes: Iterable[str]) -> int:
+        """
+        Load pricing for commonly billed codes into the cache ahead of requests.
+
+        Goes through the regular batch lookup, so the per-source cache entries
+        it writes are the ones bill comparisons read later. Codes that are
+        already cached cost a file read and no CMS call.
+
+        Returns the number of codes that came back with data.
+        """
+        pricing = self.get_pricing_for_codes(list(dict.fromkeys(hcpcs_codes)))
+        warmed = sum(1 for result in pricing.values() if result.get("has_data"))
+        logger.info(f"Prewarmed CMS pricing for {warmed}/{len(pricing)} codes")
+        return warmed
+
     def clear_cache(self):
         """Clear all cached data."""
         import shutil
+        with self._mem_lock:
+            self._mem_cache.clear()
         if CACHE_DIR.exists():
             shutil.rmtree(CACHE_DIR)
             self._ensure_cache_dir()
@@ -617,35 +924,38 @@ class CMSDataService:
 
     def get_cache_stats(self) -> Dict:
         """Get cache statistics."""
-        if not CACHE_DIR.exists():
+        try:
+            entries = [e for e in os.scandir(self._cache_dir) if e.name.endswith(".json")]
+        except FileNotFoundError:
             return {"files": 0, "size_bytes": 0}
 
-        files = list(CACHE_DIR.glob("*.json"))
-        total_size = sum(f.stat().st_size for f in files)
-
-        valid_count = sum(1 for f in files if self._is_cache_valid(f))
+        # One stat per file covers both size and expiry
+        now = time.time()
+        total_size = 0
+        valid_count = 0
+        for entry in entries:
+            st = entry.stat()
+            total_size += st.st_size
+            if now - st.st_mtime < CACHE_TTL_SECONDS:
+                valid_count += 1
 
         return {
-            "total_files": len(files),
+            "total_files": len(entries),
             "valid_files": valid_count,
-            "expired_files": len(files) - valid_count,
+            "expired_files": len(entries) - valid_count,
             "size_bytes": total_size,
-            "cache_dir": str(CACHE_DIR),
+            "cache_dir": self._cache_dir,
         }
 
-    def _safe_float(self, value: Any) -> Optional[float]:
-        """Safely convert a value to float."""
-        if value is None:
-            return None
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+    def close(self):
+        """Close the HTTP client and its pooled connections (idempotent)."""
+        self._finalizer()
+
+    def __enter__(self) -> "CMSDataService":
+        return self
 
-    def __del__(self):
-        """Clean up HTTP client."""
-        if hasattr(self, 'client'):
-            self.client.close()
+    def __exit__(self, *exc_info):
+        self.close()
 
 
 # Singleton instance
@@ -658,3 +968,11 @@ def get_cms_service() -> CMSDataService:
     if _cms_service is None:
         _cms_service = CMSDataService()
     return _cms_service
+
+
+def close_cms_service():
+    """Close the singleton's HTTP client, if it was ever created (app shutdown)."""
+    global _cms_service
+    if _cms_service is not None:
+        _cms_service.close()
+        _cms_service = None
@@ -1,6 +1,14 @@
+import io
+import os
 import re
 import logging
-from typing import Optional, List, Dict, Any
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from itertools import islice
+from typing import Optional, List, Dict, Any, BinaryIO, Iterable, Tuple, Union
 import pdfplumber
 
 # Set up logging
@@ -15,39 +23,269 @@ except ImportError:
     LLM_AVAILABLE = False
     logger.info("LLM extractor not available, using regex-based extraction only")
 
-
-def extract_line_items(pdf_path: str, use_llm: bool = True) -> List[Dict]:
+# Patterns used per table row / text line, compiled once at import
+# Dollar amounts with cents: "$1,250.00", "45.00"
+_AMOUNT_RE = re.compile(r'\$?\s*([\d,]+\.\d{2})')
+_AMOUNT_STRIP_RE = re.compile(r'\$?\s*[\d,]+\.\d{2}')
+# Looser amount for table cells (cents optional)
+_CELL_AMOUNT_RE = re.compile(r'\$?\s*([\d,]+\.?\d{0,2})')
+# Billing codes: HCPCS (letter + 4 digits), CPT (5 digits), revenue (0 + 3 digits)
+_BILLING_CODE_RE = re.compile(r'\b([A-Z]\d{4}|\d{5})\b')
+_BILLING_CODE_SPLIT_RE = re.compile(r'(?=\b(?:[A-Z]\d{4}|\d{5})\b)')
+# All three code types in one pass, as named hcpcs / cpt / revenue groups
+_ANY_CODE_RE = re.compile(r'\b(?:(?P<hcpcs>[A-Z]\d{4})|(?P<cpt>\d{5})|(?P<revenue>0\d{3}))\b')
+_PAREN_CODE_RE = re.compile(r'\s*\([A-Z0-9]{4,5}\)\s*')
+# "HC " hospital charge prefix, which repeats in merged description cells
+_HC_PREFIX_RE = re.compile(r'\bHC\s+', re.IGNORECASE)
+_HC_SPLIT_RE = re.compile(r'(?=\bHC\s+)', re.IGNORECASE)
+# Description followed by an amount, for splitting merged cells
+_MERGED_ITEM_RE = re.compile(r'([A-Za-z][^$\d]*?)\s*\$?\s*([\d,]+\.\d{2})')
+_NUMERIC_CELL_RE = re.compile(r'^[\d\$\.,\s]+$')
+# Amounts, codes and dates all need a digit; cells without one skip those scans
+_DIGIT_RE = re.compile(r'\d')
+_DATE_CELL_RE = re.compile(r'^\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}$')
+_PHONE_RE = re.compile(r'\d{3}[-.]?\d{3}[-.]?\d{4}')
+# Text lines: "description ... $amount" and "code description $amount qty".
+# Both start with a lazy .+? that can absorb any prefix, so a hit always starts
+# at column 0: use .match(), since .search() retries every column on a miss.
+_LINE_END_AMOUNT_RE = re.compile(r'(.+?)\s+\$?([\d,]+\.\d{2})\s*$')
+_MID_LINE_AMOUNT_RE = re.compile(r'(\d{5}|[A-Z]\d{4})?\s*(.+?)\s+\$?([\d,]+\.\d{2})\s+(\d+)?')
+
+# Header/footer words that rule a text line out as a line item. Searched as one
+# alternation over the lower-cased line (IGNORECASE would defeat re's fast path).
+_SKIP_WORDS = ('total', 'subtotal', 'balance', 'payment', 'date', 'page',
+               'account', 'patient', 'insurance', 'amount due', 'paid')
+_SKIP_WORDS_AGGRESSIVE = _SKIP_WORDS + ('statement', 'billing', 'address', 'phone', 'fax')
+_SKIP_LINE_RE = re.compile('|'.join(map(re.escape, _SKIP_WORDS)))
+_SKIP_LINE_AGGRESSIVE_RE = re.compile('|'.join(map(re.escape, _SKIP_WORDS_AGGRESSIVE)))
+
+# Known hospital patterns to look for (NC Triangle area), checked in order
+_HOSPITAL_PATTERNS = [
+    # Duke hospitals
+    (r"Duke University Hospital", "duke_main"),
+    (r"Duke University Medical Center", "duke_main"),
+    (r"DUMC\b", "duke_main"),
+    (r"Duke Regional Hospital", "duke_regional"),
+    (r"Duke Regional", "duke_regional"),
+    (r"Duke Raleigh Hospital", "duke_raleigh"),
+    (r"Duke Raleigh", "duke_raleigh"),
+    # UNC hospitals
+    (r"UNC Medical Center", "unc_main"),
+    (r"UNC Hospitals?", "unc_main"),
+    (r"UNC Health", "unc_main"),
+    (r"University of North Carolina Hospital", "unc_main"),
+    (r"UNC Rex Hospital", "unc_rex"),
+    (r"Rex Hospital", "unc_rex"),
+    (r"Rex Healthcare", "unc_rex"),
+    (r"UNC Hillsborough", "unc_hillsborough"),
+    (r"Hillsborough Campus", "unc_hillsborough"),
+    # WakeMed hospitals
+    (r"WakeMed Raleigh", "wakemed_raleigh"),
+    (r"WakeMed Health", "wakemed_raleigh"),
+    (r"WakeMed\b", "wakemed_raleigh"),
+    (r"WakeMed Cary", "wakemed_cary"),
+    (r"WakeMed North", "wakemed_north"),
+]
+# Matched case-sensitively against lower-cased text: with IGNORECASE, re can't
+# use its fast literal-prefix scan, making each search ~15x slower. The
+# patterns are lower-cased to compile, so don't use upper-case escapes (\S, \D).
+_HOSPITAL_PATTERNS = [
+    (re.compile(pattern.lower()), pattern, hospital_id)
+    for pattern, hospital_id in _HOSPITAL_PATTERNS
+]
+
+
+# PDFs up to this size are read into memory once and shared by every
+# extraction pass; larger ones are opened from disk by each pass
+MAX_IN_MEMORY_PDF_BYTES = 32 * 1024 * 1024  # 32 MB
+
+PdfSource = Union[str, BinaryIO]
+
+
+def _rewind(pdf_source: PdfSource) -> PdfSource:
+    """Seek an in-memory PDF back to the start before it's re-parsed."""
+    if not isinstance(pdf_source, str):
+        pdf_source.seek(0)
+    return pdf_source
+
+
+def extract_line_items(
+    pdf_path: PdfSource,
+    use_llm: bool = True,
+    page_texts: Optional[List[Optional[str]]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> List[Dict]:
     """
     Extract line items from a hospital bill PDF.
 
     Args:
-        pdf_path: Path to the PDF file
+        pdf_path: Path to the PDF file, or an in-memory copy of it
         use_llm: Whether to try LLM extraction first (default True)
+        page_texts: If given, filled with each page's text when the regex
+            extractor runs (see extract_line_items_regex)
+        stats: If given, updated with how the items were produced: "method"
+            is "llm", "regex" or "mock", "llm_failed" says whether LLM
+            extraction was tried and fell back, plus the regex extractor's
+            counters when it runs (see extract_line_items_regex)
 
     Uses LLM vision-based extraction when available, falls back to
     regex-based parsing if LLM is unavailable or returns no results.
     """
+    if stats is None:
+        stats = {}
+    stats["llm_failed"] = False
+
     # Try LLM extraction first (more accurate for complex layouts)
     if use_llm and LLM_AVAILABLE and is_llm_extraction_available():
         logger.info("Attempting LLM-based extraction...")
-        llm_items = extract_with_llm(pdf_path)
+        llm_items = extract_with_llm(_rewind(pdf_path))
         if llm_items and len(llm_items) >= 3:  # Require at least 3 items for confidence
             logger.info(f"LLM extraction successful: {len(llm_items)} items")
+            stats["method"] = "llm"
             return llm_items
         else:
             logger.info("LLM extraction returned insufficient results, falling back to regex")
+            stats["llm_failed"] = True
     elif use_llm and LLM_AVAILABLE:
         logger.info("LLM extraction not available (API key not set), using regex fallback")
     elif use_llm:
         logger.info("LLM extractor module not available, using regex fallback")
 
     # Fallback: regex-based extraction
-    return extract_line_items_regex(pdf_path)
+    return extract_line_items_regex(_rewind(pdf_path), page_texts, stats=stats)
+
+
+# Bills with at least this many pages have their pages parsed in a process
+# pool; pdfminer is pure Python, so threads would just contend for the GIL
+PARALLEL_MIN_PAGES = 8
+PAGE_WORKERS = min(4, os.cpu_count() or 1)
+
+# One pool shared by every extraction, so concurrent uploads queue for the
+# same PAGE_WORKERS processes. Workers come from a forkserver (spawn where
+# that's unavailable): extraction runs in a worker thread of a process with
+# other threads, and forking there can copy a lock another thread holds.
+_PAGE_POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+# Stop reading pages once the tables have produced this many line items
+MAX_LINE_ITEMS = 500
+
+# Use stricter table settings to avoid cell merging
+_TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+    "edge_min_length": 3,
+    "min_words_vertical": 1,
+    "min_words_horizontal": 1,
+}
+_TEXT_TABLE_SETTINGS = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+}
+
+
+def _extract_page(page) -> Tuple[Optional[str], list]:
+    """
+    Extract one page's text and tables, then release the page's cached
+    layout objects so memory stays at about one page.
+    """
+    try:
+        text = page.extract_text()
+
+        # Try with strict settings first
+        tables = page.extract_tables(_TABLE_SETTINGS)
+
+        # If no tables found, try with text-based detection
+        if not tables:
+            tables = page.extract_tables(_TEXT_TABLE_SETTINGS)
+    finally:
+        page.close()
+    return text, tables
+
+
+def _extract_page_range(pdf_data: Union[str, bytes], page_numbers: List[int]) -> List[Tuple[Optional[str], list]]:
+    """Worker: open the PDF for just these (1-based) pages and extract them."""
+    source = pdf_data if isinstance(pdf_data, str) else io.BytesIO(pdf_data)
+    with pdfplumber.open(source, pages=page_numbers) as pdf:
+        return [_extract_page(page) for page in pdf.pages]
 
 
-def extract_line_items_regex(pdf_path: str) -> List[Dict]:
-    """Extract line items using regex-based parsing (fallback method)."""
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Get the shared page pool, starting it on first use."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PAGE_WORKERS,
+                mp_context=multiprocessing.get_context(_PAGE_POOL_START_METHOD),
+            )
+        return _page_pool
+
+
+def shutdown_page_pool():
+    """Stop the shared page pool's workers, if it was ever started (app shutdown)."""
+    global _page_pool
+    with _page_pool_lock:
+        pool, _page_pool = _page_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _extract_pages_parallel(pdf_path: PdfSource, page_count: int) -> List[Tuple[Optional[str], list]]:
+    """
+    Extract every page across PAGE_WORKERS processes, one contiguous range
+    per worker, and return the results in page order.
+    """
+    global _page_pool
+    # Workers get the path, or the bytes when the PDF is already in memory
+    pdf_data = pdf_path if isinstance(pdf_path, str) else _rewind(pdf_path).read()
+    per_worker = -(-page_count // PAGE_WORKERS)
+    ranges = [
+        list(range(start, min(start + per_worker, page_count + 1)))
+        for start in range(1, page_count + 1, per_worker)
+    ]
+    logger.info(f"Extracting {page_count} pages across {len(ranges)} processes")
+
+    pool = _get_page_pool()
+    try:
+        futures = [pool.submit(_extract_page_range, pdf_data, pages) for pages in ranges]
+        return [result for future in futures for result in future.result()]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); drop the pool so the next
+        # long bill starts a fresh one instead of failing forever
+        with _page_pool_lock:
+            if _page_pool is pool:
+                _page_pool = None
+        pool.shutdown(wait=False)
+        raise
+
+
+def extract_line_items_regex(
+    pdf_path: PdfSource,
+    page_texts: Optional[List[Optional[str]]] = None,
+    max_items: int = MAX_LINE_ITEMS,
+    stats: Optional[Dict[str, Any]] = None,
+) -> List[Dict]:
+    """
+    Extract line items using regex-based parsing (fallback method).
+
+    If page_texts is given, it's filled with each parsed page's extracted text
+    (None for pages without any) so callers can reuse it instead of re-parsing.
+    Once the tables yield max_items items, the remaining pages are skipped,
+    unless they were already parsed in the process pool. If stats is given,
+    it's updated with the extraction's counters; "truncated" says whether
+    pages were skipped and "method" is "mock" when demo items were returned
+    instead, "regex" otherwise.
+    """
     line_items = []
+    # Amounts already in line_items, kept in step so strategies 2 and 3 can
+    # skip duplicates without rescanning the list
+    existing_amounts = set()
     debug_info = {
         "pages": 0,
         "tables_found": 0,
@@ -55,45 +293,30 @@ def extract_line_items_regex(pdf_path: str) -> List[Dict]:
         "text_lines": 0,
         "items_from_tables": 0,
         "items_from_text": 0,
+        "truncated": False,
     }
 
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            debug_info["pages"] = len(pdf.pages)
-            logger.info(f"Processing PDF with {len(pdf.pages)} pages")
+            page_count = len(pdf.pages)
+            debug_info["pages"] = page_count
+            logger.info(f"Processing PDF with {page_count} pages")
+
+            # Strategy 1: Try to extract from tables (see _extract_page). Long
+            # bills are parsed in worker processes, each opening its own pages;
+            # otherwise pages are parsed one at a time as the loop reaches them.
+            parallel = page_count >= PARALLEL_MIN_PAGES and PAGE_WORKERS > 1
+            if parallel:
+                page_results = _extract_pages_parallel(pdf_path, page_count)
+            else:
+                page_results = map(_extract_page, pdf.pages)
 
-            # Extract all text for pattern matching
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
+            texts = []
+            for page_num, (text, tables) in enumerate(page_results):
+                if page_texts is not None:
+                    page_texts.append(text)
                 if text:
-                    full_text += text + "\n"
-
-            debug_info["text_lines"] = len(full_text.split('\n'))
-            logger.info(f"Extracted {debug_info['text_lines']} lines of text")
-
-            # Strategy 1: Try to extract from tables with explicit settings
-            # Use stricter table settings to avoid cell merging
-            table_settings = {
-                "vertical_strategy": "lines",
-                "horizontal_strategy": "lines",
-                "snap_tolerance": 3,
-                "join_tolerance": 3,
-                "edge_min_length": 3,
-                "min_words_vertical": 1,
-                "min_words_horizontal": 1,
-            }
-
-            for page_num, page in enumerate(pdf.pages):
-                # Try with strict settings first
-                tables = page.extract_tables(table_settings)
-
-                # If no tables found, try with text-based detection
-                if not tables:
-                    tables = page.extract_tables({
-                        "vertical_strategy": "text",
-                        "horizontal_strategy": "text",
-                    })
+                    texts.append(text)
 
                 debug_info["tables_found"] += len(tables)
 
@@ -107,40 +330,63 @@ def extract_line_items_regex(pdf_path: str) -> List[Dict]:
                             for item in items:
                                 if item:
                                     line_items.append(item)
+                                    existing_amounts.add(item["amount"])
                                     debug_info["items_from_tables"] += 1
 
-            logger.info(f"Found {debug_info['items_from_tables']} items from tables")
+                # Enough items: stop parsing pages. Pages 1-2 are always read,
+                # since hospital detection reuses their text. The pool has
+                # already parsed every page, so its items are all kept.
+                if (not parallel and len(line_items) >= max_items
+                        and 2 <= page_num + 1 < page_count):
+                    debug_info["truncated"] = True
+                    logger.warning(
+                        f"Stopping after page {page_num + 1} of {page_count}: "
+                        f"{len(line_items)} line items reached max_items={max_items}; "
+                        f"results are partial"
+                    )
+                    break
+
+        # Extract all text for pattern matching
+        full_text = "".join(text + "\n" for text in texts)
 
-            # Strategy 2: Pattern matching on text (always try, merge results)
+        debug_info["text_lines"] = len(full_text.split('\n'))
+        logger.info(f"Extracted {debug_info['text_lines']} lines of text")
+
+        logger.info(f"Found {debug_info['items_from_tables']} items from tables")
+
+        # Strategy 2: Pattern matching on text. Its items are only merged if
+        # we didn't get many from tables, so skip the pass otherwise.
+        if len(line_items) < 5:
             text_items = extract_from_text(full_text)
             debug_info["items_from_text"] = len(text_items)
             logger.info(f"Found {debug_info['items_from_text']} items from text patterns")
 
-            # Merge text items if we didn't get many from tables
-            if len(line_items) < 5:
-                # Add text items that aren't duplicates
-                existing_amounts = {item["amount"] for item in line_items}
-                for item in text_items:
-                    if item["amount"] not in existing_amounts:
-                        line_items.append(item)
-                        existing_amounts.add(item["amount"])
-
-            # Strategy 3: Try more aggressive text extraction
-            if len(line_items) < 10:
-                aggressive_items = extract_from_text_aggressive(full_text)
-                logger.info(f"Aggressive extraction found {len(aggressive_items)} additional items")
-                existing_amounts = {item["amount"] for item in line_items}
-                for item in aggressive_items:
-                    if item["amount"] not in existing_amounts:
-                        line_items.append(item)
-                        existing_amounts.add(item["amount"])
+            # Add text items that aren't duplicates
+            for item in text_items:
+                if item["amount"] not in existing_amounts:
+                    line_items.append(item)
+                    existing_amounts.add(item["amount"])
+
+        # Strategy 3: Try more aggressive text extraction
+        if len(line_items) < 10:
+            aggressive_items = extract_from_text_aggressive(full_text)
+            logger.info(f"Aggressive extraction found {len(aggressive_items)} additional items")
+            for item in aggressive_items:
+                if item["amount"] not in existing_amounts:
+                    line_items.append(item)
+                    existing_amounts.add(item["amount"])
 
     except Exception as e:
         logger.error(f"Error extracting PDF: {e}", exc_info=True)
+        if stats is not None:
+            stats["method"] = "mock"
         return get_mock_line_items()
 
     logger.info(f"Total extracted: {len(line_items)} line items")
     logger.info(f"Debug info: {debug_info}")
+    if stats is not None:
+        stats.update(debug_info)
+        stats["method"] = "regex" if line_items else "mock"
 
     # If still no items, return mock data for demo
     if not line_items:
@@ -148,7 +394,7 @@ def extract_line_items_regex(pdf_path: str) -> List[Dict]:
         return get_mock_line_items()
 
     # Sort by amount descending for better readability
-    line_items.sort(key=lambda x: x["amount"], reverse=True)
+    line_items.sort(key=itemgetter("amount"), reverse=True)
 
     return line_items
 
@@ -167,22 +413,26 @@ def parse_table_row_with_split(row: list) -> List[Optional[dict]]:
         if not cell:
             continue
 
-        # Look for multiple amounts in one cell (sign of merged rows)
-        amounts_in_cell = re.findall(r'\$?\s*([\d,]+\.\d{2})', cell)
-        if len(amounts_in_cell) >= 2:
-            logger.info(f"Detected merged cell with {len(amounts_in_cell)} amounts, attempting split")
-            return split_merged_cell(cell)
-
-        # Look for repeating patterns like "HC ... HC ..." which indicates merged descriptions
-        hc_pattern_count = len(re.findall(r'\bHC\s+', cell, re.IGNORECASE))
-        if hc_pattern_count >= 2:
-            logger.info(f"Detected merged cell with {hc_pattern_count} 'HC' patterns, attempting split")
-            return split_merged_descriptions(cells)
+        # Look for multiple amounts in one cell (sign of merged rows). Each
+        # amount has a '.', so most cells are ruled out without the regex.
+        if cell.count('.') >= 2:
+            amounts_in_cell = _AMOUNT_RE.findall(cell)
+            if len(amounts_in_cell) >= 2:
+                logger.info(f"Detected merged cell with {len(amounts_in_cell)} amounts, attempting split")
+                return split_merged_cell(cell)
+
+        # Look for repeating patterns like "HC ... HC ..." which indicates merged
+        # descriptions (again only worth a regex if "hc" appears twice)
+        if cell.lower().count('hc') >= 2:
+            hc_pattern_count = len(_HC_PREFIX_RE.findall(cell))
+            if hc_pattern_count >= 2:
+                logger.info(f"Detected merged cell with {hc_pattern_count} 'HC' patterns, attempting split")
+                return split_merged_descriptions(cells)
 
         # Look for multiple HCPCS/CPT codes in description (not in code column)
         # Skip if it's a short cell that's likely just a code
         if len(cell) > 20:
-            codes_in_cell = re.findall(r'\b(?:[A-Z]\d{4}|\d{5})\b', cell)
+            codes_in_cell = _BILLING_CODE_RE.findall(cell)
             if len(codes_in_cell) >= 2:
                 logger.info(f"Detected merged cell with {len(codes_in_cell)} codes: {codes_in_cell}")
                 return split_by_codes(cell)
@@ -198,8 +448,7 @@ def split_merged_cell(cell_text: str) -> List[Optional[dict]]:
 
     # Try to split by finding amount patterns and their preceding descriptions
     # Pattern: description followed by amount, possibly with code
-    pattern = r'([A-Za-z][^$\d]*?)\s*\$?\s*([\d,]+\.\d{2})'
-    matches = re.findall(pattern, cell_text)
+    matches = _MERGED_ITEM_RE.findall(cell_text)
 
     for desc, amount_str in matches:
         desc = desc.strip()
@@ -212,7 +461,7 @@ def split_merged_cell(cell_text: str) -> List[Optional[dict]]:
                 code = extract_code(desc)
                 items.append({
                     "code": code,
-                    "description": re.sub(r'\s+', ' ', desc)[:100],
+                    "description": ' '.join(desc.split())[:100],
                     "quantity": 1,
                     "amount": amount,
                 })
@@ -234,23 +483,23 @@ def split_merged_descriptions(cells: list) -> List[Optional[dict]]:
         if not cell:
             continue
         # Collect amounts
-        cell_amounts = re.findall(r'\$?\s*([\d,]+\.\d{2})', cell)
+        cell_amounts = _AMOUNT_RE.findall(cell)
         amounts.extend([float(a.replace(',', '')) for a in cell_amounts])
 
         # Find the longest text cell (likely the merged description)
-        if len(cell) > len(merged_desc) and not re.match(r'^[\d\$\.,\s]+$', cell):
+        if len(cell) > len(merged_desc) and not _NUMERIC_CELL_RE.match(cell):
             merged_desc = cell
 
     if not merged_desc:
         return []
 
     # Try to split by "HC " pattern (common hospital charge prefix)
-    parts = re.split(r'(?=\bHC\s+)', merged_desc, flags=re.IGNORECASE)
+    parts = _HC_SPLIT_RE.split(merged_desc)
     parts = [p.strip() for p in parts if p.strip()]
 
     if len(parts) <= 1:
         # Try splitting by code patterns
-        parts = re.split(r'(?=\b(?:[A-Z]\d{4}|\d{5})\b)', merged_desc)
+        parts = _BILLING_CODE_SPLIT_RE.split(merged_desc)
         parts = [p.strip() for p in parts if p.strip() and len(p) > 5]
 
     # Match parts with amounts (if we have the same number)
@@ -259,8 +508,7 @@ def split_merged_descriptions(cells: list) -> List[Optional[dict]]:
         code = extract_code(part)
 
         # Clean description
-        desc = re.sub(r'\b(?:[A-Z]\d{4}|\d{5})\b', '', part)
-        desc = re.sub(r'\s+', ' ', desc).strip()
+        desc = ' '.join(_BILLING_CODE_RE.sub('', part).split())
 
         if len(desc) < 3:
             continue
@@ -288,13 +536,13 @@ def split_by_codes(cell_text: str) -> List[Optional[dict]]:
     items = []
 
     # Find all codes and their positions
-    code_matches = list(re.finditer(r'\b([A-Z]\d{4}|\d{5})\b', cell_text))
+    code_matches = list(_BILLING_CODE_RE.finditer(cell_text))
 
     if len(code_matches) < 2:
         return []
 
     # Find all amounts
-    amounts = re.findall(r'\$?\s*([\d,]+\.\d{2})', cell_text)
+    amounts = _AMOUNT_RE.findall(cell_text)
     amount_values = [float(a.replace(',', '')) for a in amounts]
 
     # Split text by codes
@@ -307,13 +555,12 @@ def split_by_codes(cell_text: str) -> List[Optional[dict]]:
 
         desc_part = cell_text[start:end].strip()
         # Remove amounts from description
-        desc_part = re.sub(r'\$?\s*[\d,]+\.\d{2}', '', desc_part)
-        desc_part = re.sub(r'\s+', ' ', desc_part).strip()
+        desc_part = ' '.join(_AMOUNT_STRIP_RE.sub('', desc_part).split())
 
         # Also check text before the code
         if i == 0 and match.start() > 0:
             prefix = cell_text[:match.start()].strip()
-            prefix = re.sub(r'\$?\s*[\d,]+\.\d{2}', '', prefix).strip()
+            prefix = _AMOUNT_STRIP_RE.sub('', prefix).strip()
             if prefix and len(prefix) > 3:
                 desc_part = prefix + " " + desc_part
 
@@ -327,7 +574,7 @@ def split_by_codes(cell_text: str) -> List[Optional[dict]]:
         elif amount_values:
             # Try to find amount near this code in original text
             code_pos = match.start()
-            for j, amt_match in enumerate(re.finditer(r'\$?\s*([\d,]+\.\d{2})', cell_text)):
+            for j, amt_match in enumerate(_AMOUNT_RE.finditer(cell_text)):
                 if amt_match.start() > code_pos:
                     amount = float(amt_match.group(1).replace(',', ''))
                     break
@@ -343,6 +590,30 @@ def split_by_codes(cell_text: str) -> List[Optional[dict]]:
     return items if items else []
 
 
+def _cell_amount(cell: str) -> Optional[float]:
+    """
+    Parse the first currency amount in a table cell, or None if there is none.
+
+    Most amount cells are just a number like "$1,234.56", which is parsed
+    directly; anything else goes through _CELL_AMOUNT_RE.
+    """
+    text = cell.replace(',', '')
+    plain = text[1:].lstrip() if text.startswith('$') else text
+    whole, _, cents = plain.partition('.')
+    if whole.isdecimal() and (not cents or (len(cents) <= 2 and cents.isdecimal())):
+        return float(plain)
+    if not _DIGIT_RE.search(text):
+        return None
+
+    match = _CELL_AMOUNT_RE.search(text)
+    if match:
+        try:
+            return float(match.group(1))
+        except ValueError:
+            pass
+    return None
+
+
 def parse_table_row(row: list) -> Optional[dict]:
     """Parse a table row into a line item."""
     # Keep original cells with their positions (don't filter empty ones yet for column tracking)
@@ -360,19 +631,12 @@ def parse_table_row(row: list) -> Optional[dict]:
 
     # Search from right to left (amounts usually on the right)
     for i in range(len(cells) - 1, -1, -1):
-        cell = cells[i]
-        # Match various currency formats
-        match = re.search(r'\$?\s*([\d,]+\.?\d{0,2})', cell.replace(',', ''))
-        if match:
-            try:
-                val = float(match.group(1).replace(',', ''))
-                # Filter out likely non-amounts (dates, codes, etc.)
-                if val > 1 and val < 1000000:
-                    amount = val
-                    amount_idx = i
-                    break
-            except ValueError:
-                pass
+        val = _cell_amount(cells[i])
+        # Filter out likely non-amounts (dates, codes, etc.)
+        if val is not None and val > 1 and val < 1000000:
+            amount = val
+            amount_idx = i
+            break
 
     if amount is None:
         return None
@@ -384,28 +648,31 @@ def parse_table_row(row: list) -> Optional[dict]:
     revenue_codes = []   # 4-digit codes starting with 0
 
     for idx, cell in enumerate(cells):
-        # Skip date-like cells (MM/DD/YYYY or similar)
-        if re.match(r'^\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}$', cell):
+        # Skip description cells with no digits and date-like cells
+        # (MM/DD/YYYY or similar)
+        if not _DIGIT_RE.search(cell) or _DATE_CELL_RE.match(cell):
             continue
 
+        # First code of each type in the cell, from a single scan
+        first_codes = {}
+        for match in _ANY_CODE_RE.finditer(cell):
+            first_codes.setdefault(match.lastgroup, match.group())
+
         # HCPCS codes (letter + 4 digits) - highest priority
-        hcpcs_match = re.search(r'\b([A-Z]\d{4})\b', cell)
-        if hcpcs_match:
-            hcpcs_codes.append((idx, hcpcs_match.group(1)))
+        if "hcpcs" in first_codes:
+            hcpcs_codes.append((idx, first_codes["hcpcs"]))
 
         # 5-digit CPT codes - high priority
-        cpt_match = re.search(r'\b(\d{5})\b', cell)
-        if cpt_match:
+        if "cpt" in first_codes:
             # Make sure it's not part of a longer number (like a phone number or date)
-            potential_cpt = cpt_match.group(1)
+            potential_cpt = first_codes["cpt"]
             # CPT codes typically don't start with 0 and are in range 00100-99499
             if not cell.replace(potential_cpt, '').strip().isdigit():
                 cpt_codes.append((idx, potential_cpt))
 
         # Revenue codes (4 digits starting with 0) - lowest priority
-        rev_match = re.search(r'\b(0\d{3})\b', cell)
-        if rev_match:
-            revenue_codes.append((idx, rev_match.group(1)))
+        if "revenue" in first_codes:
+            revenue_codes.append((idx, first_codes["revenue"]))
 
     # Select the best code - prefer HCPCS > CPT > Revenue
     # If multiple codes of same type, prefer ones NOT in the first 2 columns (col 0-1 are often date/rev code)
@@ -444,7 +711,7 @@ def parse_table_row(row: list) -> Optional[dict]:
     for i, cell in enumerate(cells):
         if i != amount_idx and len(cell) > len(description):
             # Skip cells that are mostly numbers/currency
-            if not re.match(r'^[\d\$\.,\s]+$', cell) and len(cell) > 3:
+            if not _NUMERIC_CELL_RE.match(cell) and len(cell) > 3:
                 description = cell
 
     if not description:
@@ -453,9 +720,9 @@ def parse_table_row(row: list) -> Optional[dict]:
     # Clean up description - remove any embedded code in parentheses if we found a better code
     if code and code_source in ("hcpcs", "cpt"):
         # Remove things like (55150) from the description since we have the real code
-        description = re.sub(r'\s*\([A-Z0-9]{4,5}\)\s*', ' ', description)
+        description = _PAREN_CODE_RE.sub(' ', description)
 
-    description = re.sub(r'\s+', ' ', description).strip()
+    description = ' '.join(description.split())
 
     return {
         "code": code,
@@ -472,18 +739,20 @@ def extract_from_text(text: str) -> List[Dict]:
 
     lines = text.split('\n')
     for line in lines:
+        # Reject before stripping (strip only shortens a line). Both patterns
+        # need an amount with cents, so no '.' means no item.
+        if len(line) < 5 or '.' not in line:
+            continue
         line = line.strip()
-        if not line or len(line) < 5:
+        if len(line) < 5:
             continue
 
         # Skip header/footer lines
-        skip_words = ['total', 'subtotal', 'balance', 'payment', 'date', 'page',
-                      'account', 'patient', 'insurance', 'amount due', 'paid']
-        if any(skip in line.lower() for skip in skip_words):
+        if _SKIP_LINE_RE.search(line.lower()):
             continue
 
         # Pattern 1: description followed by amount at end of line
-        match = re.search(r'(.+?)\s+\$?([\d,]+\.\d{2})\s*$', line)
+        match = _LINE_END_AMOUNT_RE.match(line)
         if match:
             description = match.group(1).strip()
             amount_str = match.group(2).replace(',', '')
@@ -508,7 +777,7 @@ def extract_from_text(text: str) -> List[Dict]:
                 pass
 
         # Pattern 2: amount in middle of line (code description amount quantity)
-        match = re.search(r'(\d{5}|[A-Z]\d{4})?\s*(.+?)\s+\$?([\d,]+\.\d{2})\s+(\d+)?', line)
+        match = _MID_LINE_AMOUNT_RE.match(line)
         if match and match.group(2):
             code = match.group(1)
             description = match.group(2).strip()
@@ -539,27 +808,27 @@ def extract_from_text_aggressive(text: str) -> List[Dict]:
 
     lines = text.split('\n')
     for line in lines:
+        # Reject before stripping (strip only shortens a line). _AMOUNT_RE
+        # needs cents, so a line without '.' has no amount.
+        if len(line) < 10 or '.' not in line:
+            continue
         line = line.strip()
-        if not line or len(line) < 10:
+        if len(line) < 10:
             continue
 
         # Skip obvious non-item lines
-        skip_patterns = ['total', 'subtotal', 'balance', 'payment', 'date', 'page',
-                         'account', 'patient', 'insurance', 'amount due', 'paid',
-                         'statement', 'billing', 'address', 'phone', 'fax']
-        if any(skip in line.lower() for skip in skip_patterns):
+        if _SKIP_LINE_AGGRESSIVE_RE.search(line.lower()):
             continue
 
         # Find all dollar amounts in the line
-        amounts = re.findall(r'\$?\s*([\d,]+\.\d{2})', line)
+        amounts = _AMOUNT_RE.findall(line)
         if amounts:
             # Take the last amount (usually the charge amount)
             try:
                 amount = float(amounts[-1].replace(',', ''))
                 if amount > 1 and amount < 100000 and amount not in seen_amounts:
                     # Remove the amount from the line to get description
-                    description = re.sub(r'\$?\s*[\d,]+\.\d{2}', '', line).strip()
-                    description = re.sub(r'\s+', ' ', description)
+                    description = ' '.join(_AMOUNT_STRIP_RE.sub('', line).split())
 
                     if len(description) > 5:
                         code = extract_code(line)
@@ -588,8 +857,21 @@ def extract_code(text: str) -> Optional[str]:
     For each type, if multiple matches exist, prefer ones NOT in parentheses
     (parenthetical codes are often internal references, not billing codes).
     """
-    # First, try to find HCPCS codes (letter + 4 digits) - highest priority for drugs
-    hcpcs_matches = re.findall(r'\b([A-Z]\d{4})\b', text)
+    # One scan buckets every code by type. Codes are whole \b-delimited
+    # tokens, so this finds exactly what a separate findall per type would.
+    hcpcs_matches = []
+    cpt_matches = []  # (code, position in text)
+    revenue_code = None
+    for match in _ANY_CODE_RE.finditer(text):
+        hcpcs, cpt, revenue = match.groups()
+        if hcpcs:
+            hcpcs_matches.append(hcpcs)
+        elif cpt:
+            cpt_matches.append((cpt, match.start()))
+        elif revenue_code is None:
+            revenue_code = revenue
+
+    # HCPCS codes (letter + 4 digits) - highest priority for drugs
     if hcpcs_matches:
         # Prefer ones not in parentheses
         for code in hcpcs_matches:
@@ -598,14 +880,13 @@ def extract_code(text: str) -> Optional[str]:
         return hcpcs_matches[0]
 
     # 5-digit CPT codes - check if they look like valid CPT codes
-    cpt_matches = re.findall(r'\b(\d{5})\b', text)
     if cpt_matches:
         # Filter out unlikely CPT codes and prefer ones not in parentheses
         valid_cpts = []
-        for code in cpt_matches:
-            # Skip if it's part of a phone number pattern or looks like a zip code
-            context = text[max(0, text.find(code)-5):text.find(code)+10]
-            if re.search(r'\d{3}[-.]?\d{3}[-.]?\d{4}', context):  # phone number
+        for code, start in cpt_matches:
+            # Skip if it's part of a phone number pattern or looks like a zip
+            # code (searches text[start-5:start+10] without slicing it)
+            if _PHONE_RE.search(text, max(0, start - 5), start + 10):  # phone number
                 continue
             if f"({code})" not in text:
                 valid_cpts.insert(0, code)  # Prefer non-parenthetical
@@ -616,11 +897,7 @@ def extract_code(text: str) -> Optional[str]:
 
     # Revenue codes (4 digits, often starting with 0) - lowest priority
     # Only use if no CPT/HCPCS found
-    match = re.search(r'\b(0\d{3})\b', text)
-    if match:
-        return match.group(1)
-
-    return None
+    return revenue_code
 
 
 def get_mock_line_items() -> List[Dict]:
@@ -634,78 +911,66 @@ def get_mock_line_items() -> List[Dict]:
     ]
 
 
-def extract_hospital_info(pdf_path: str) -> Optional[Dict]:
+def _match_known_hospital(text: str) -> Optional[Dict]:
+    """Check text against the known hospital patterns, in priority order."""
+    text_lower = text.lower()
+    for compiled, pattern, hospital_id in _HOSPITAL_PATTERNS:
+        if compiled.search(text_lower):
+            logger.info(f"Detected hospital: {hospital_id} (matched pattern: {pattern})")
+            return {
+                "hospital_id": hospital_id,
+                "confidence": "high",
+                "matched_pattern": pattern,
+            }
+    return None
+
+
+def _detect_hospital(page_texts: Iterable[Optional[str]]) -> Optional[Dict]:
+    """
+    Detect the hospital from a bill's page texts; only the first two are used.
+
+    page_texts may be lazy: page 2 is only pulled when page 1 names no known
+    hospital.
+    """
+    text = ""
+    for page_text in islice(page_texts, 2):
+        if page_text:
+            text += page_text + "\n"
+            # A known hospital in the first page's header settles it
+            known = _match_known_hospital(text)
+            if known:
+                return known
+
+    if not text:
+        return None
+
+    # Try to find any hospital-like entity in the header
+    # Look for lines containing "hospital", "medical center", "health"
+    lines = text.split('\n')[:20]  # Focus on first 20 lines
+    for line in lines:
+        line_lower = line.lower().strip()
+        if any(term in line_lower for term in ['hospital', 'medical center', 'health system', 'clinic']):
+            # This looks like it might be a hospital name
+            logger.info(f"Possible hospital name found: {line.strip()}")
+            return {
+                "hospital_id": None,
+                "detected_name": line.strip()[:100],
+                "confidence": "low",
+            }
+
+    return None
+
+
+def extract_hospital_info(pdf_path: PdfSource) -> Optional[Dict]:
     """
     Extract hospital/provider information from a PDF.
     Returns dict with detected hospital info or None if not found.
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # Focus on first 1-2 pages where hospital info usually appears
-            text = ""
-            for page in pdf.pages[:2]:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-
-            if not text:
-                return None
-
-            # Known hospital patterns to look for (NC Triangle area)
-            hospital_patterns = [
-                # Duke hospitals
-                (r"Duke University Hospital", "duke_main"),
-                (r"Duke University Medical Center", "duke_main"),
-                (r"DUMC\b", "duke_main"),
-                (r"Duke Regional Hospital", "duke_regional"),
-                (r"Duke Regional", "duke_regional"),
-                (r"Duke Raleigh Hospital", "duke_raleigh"),
-                (r"Duke Raleigh", "duke_raleigh"),
-                # UNC hospitals
-                (r"UNC Medical Center", "unc_main"),
-                (r"UNC Hospitals?", "unc_main"),
-                (r"UNC Health", "unc_main"),
-                (r"University of North Carolina Hospital", "unc_main"),
-                (r"UNC Rex Hospital", "unc_rex"),
-                (r"Rex Hospital", "unc_rex"),
-                (r"Rex Healthcare", "unc_rex"),
-                (r"UNC Hillsborough", "unc_hillsborough"),
-                (r"Hillsborough Campus", "unc_hillsborough"),
-                # WakeMed hospitals
-                (r"WakeMed Raleigh", "wakemed_raleigh"),
-                (r"WakeMed Health", "wakemed_raleigh"),
-                (r"WakeMed\b", "wakemed_raleigh"),
-                (r"WakeMed Cary", "wakemed_cary"),
-                (r"WakeMed North", "wakemed_north"),
-            ]
-
-            text_upper = text.upper()
-            text_lower = text.lower()
-
-            for pattern, hospital_id in hospital_patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    logger.info(f"Detected hospital: {hospital_id} (matched pattern: {pattern})")
-                    return {
-                        "hospital_id": hospital_id,
-                        "confidence": "high",
-                        "matched_pattern": pattern,
-                    }
-
-            # Try to find any hospital-like entity in the header
-            # Look for lines containing "hospital", "medical center", "health"
-            lines = text.split('\n')[:20]  # Focus on first 20 lines
-            for line in lines:
-                line_lower = line.lower().strip()
-                if any(term in line_lower for term in ['hospital', 'medical center', 'health system', 'clinic']):
-                    # This looks like it might be a hospital name
-                    logger.info(f"Possible hospital name found: {line.strip()}")
-                    return {
-                        "hospital_id": None,
-                        "detected_name": line.strip()[:100],
-                        "confidence": "low",
-                    }
-
-            return None
+        # Focus on first 1-2 pages where hospital info usually appears; later
+        # pages are never parsed
+        with pdfplumber.open(_rewind(pdf_path), pages=[1, 2]) as pdf:
+            return _detect_hospital(page.extract_text() for page in pdf.pages)
 
     except Exception as e:
         logger.error(f"Error extracting hospital info: {e}")
@@ -715,12 +980,32 @@ def extract_hospital_info(pdf_path: str) -> Optional[Dict]:
 def extract_bill_data(pdf_path: str) -> Dict:
     """
     Extract all bill data including line items and hospital info.
-    Returns a dict with line_items and detected_hospital.
+    Returns a dict with line_items, detected_hospital, truncated and
+    fallback, which is True when the items didn't come from the primary
+    extractor (LLM extraction failed, or demo items replaced an unreadable
+    bill), so a retry may do better.
     """
-    line_items = extract_line_items(pdf_path)
-    hospital_info = extract_hospital_info(pdf_path)
+    # Read the file once so both passes parse from memory instead of
+    # re-opening and re-reading it from disk
+    pdf_source: PdfSource = pdf_path
+    if os.path.getsize(pdf_path) <= MAX_IN_MEMORY_PDF_BYTES:
+        with open(pdf_path, "rb") as f:
+            pdf_source = io.BytesIO(f.read())
+
+    # The regex extractor already has every page's text, so hospital detection
+    # reuses it; only LLM-extracted (or unreadable) bills are opened again
+    page_texts: List[Optional[str]] = []
+    stats: Dict[str, Any] = {}
+    line_items = extract_line_items(pdf_source, page_texts=page_texts, stats=stats)
+    if page_texts:
+        hospital_info = _detect_hospital(page_texts)
+    else:
+        hospital_info = extract_hospital_info(pdf_source)
 
     return {
         "line_items": line_items,
         "detected_hospital": hospital_info,
+        # Pages were skipped after max_items line items (see extract_line_items_regex)
+        "truncated": stats.get("truncated", False),
+        "fallback": stats["llm_failed"] or stats.get("method") == "mock",
     }
@@ -0,0 +1,182 @@
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import cms_data_service
+from app.services.cms_data_service import DATASETS, NEGATIVE_CACHE_TTL_SECONDS
+
+PHYSICIAN = DATASETS["physician_services"]
+OUTPATIENT = DATASETS["outpatient_services"]
+DRUGS = DATASETS["part_b_drugs"]
+
+OFFICE_VISIT = [{"HCPCS_Desc": "Established patient office or other outpatient visit",
+                 "Avg_Mdcr_Pymt_Amt": "92.50", "Avg_Sbmtd_Chrg": "210.00"}]
+ED_VISIT = [{"HCPCS_Desc": "Emergency department visit for moderate complexity",
+             "Avg_Mdcr_Pymt_Amt": "120.00", "Avg_Sbmtd_Chrg": "900.00"}]
+ED_FACILITY = [{"APC_Desc": "Level 4 Type A ED Visits",
+                "Avg_Mdcr_Pymt_Amt": "500.00", "Avg_Tot_Sbmtd_Chrgs": "3100.00"}]
+
+
+def _drug(code, price):
+    return [{"HCPCS_Cd": code, "HCPCS_Desc": f"Injection {code}", "Avg_DY23_ASP_Price": str(price)}]
+
+
+class FakeCMS:
+    """CMS Data API stand-in: canned rows per (dataset, code), with switchable outages."""
+
+    def __init__(self):
+        self.rows = {}
+        self.down = set()  # datasets answering 503
+        self.batch_down = False  # IN-filtered queries answering 503
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        dataset = request.url.path.split("/")[-2]
+        params = request.url.params
+        values = params.get_list("filter[codes][condition][value][]")
+        if dataset in self.down or (values and self.batch_down):
+            return httpx.Response(503)
+        if not values:
+            values = [params.get("filter[HCPCS_Cd]") or params.get("filter[APC_Cd]")]
+        return httpx.Response(200, json=[row for value in values for row in self.rows.get((dataset, value), [])])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the service's notion of now (the cache files keep real mtimes)."""
+    state = SimpleNamespace(offset=0.0)
+    monkeypatch.setattr(cms_data_service, "time", SimpleNamespace(time=lambda: time.time() + state.offset))
+    return state
+
+
+@pytest.fixture
+def cms(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(cms_data_service, "CACHE_DIR", tmp_path / "cache")
+    fake = FakeCMS()
+    clients = []
+
+    def make_service():
+        """A service with an empty in-memory cache over the shared cache dir."""
+        service = cms_data_service.CMSDataService()
+        service.close()
+        service.client = httpx.Client(transport=httpx.MockTransport(fake.handler))
+        clients.append(service.client)
+        return service
+
+    fake.make_service = make_service
+    fake.service = make_service()
+    yield fake
+    for client in clients:
+        client.close()
+
+
+def test_empty_answer_is_cached_for_an_hour(cms, clock):
+    cms.rows[(PHYSICIAN, "99213")] = OFFICE_VISIT
+
+    assert cms.service.get_physician_fee_by_hcpcs("99212") is None
+    assert cms.service.get_physician_fee_by_hcpcs("99213") is not None
+    assert len(cms.requests) == 2
+
+    clock.offset = NEGATIVE_CACHE_TTL_SECONDS - 60
+    for service in (cms.service, cms.make_service()):
+        assert service.get_physician_fee_by_hcpcs("99212") is None
+    assert len(cms.requests) == 2
+
+    # The negative entry expires; the real result is kept for the full day
+    clock.offset = NEGATIVE_CACHE_TTL_SECONDS + 60
+    for service in (cms.service, cms.make_service()):
+        assert service.get_physician_fee_by_hcpcs("99213") is not None
+    assert len(cms.requests) == 2
+    assert cms.service.get_physician_fee_by_hcpcs("99212") is None
+    assert len(cms.requests) == 3
+
+
+def test_http_failure_is_not_cached(cms):
+    cms.rows[(PHYSICIAN, "99213")] = OFFICE_VISIT
+    cms.down.add(PHYSICIAN)
+
+    assert cms.service.get_physician_fee_by_hcpcs("99213") is None
+    assert not any(cms_data_service.CACHE_DIR.iterdir())
+
+    cms.down.clear()
+    result = cms.service.get_physician_fee_by_hcpcs("99213")
+    assert result["medicare_payment"]["average"] == 92.5
+    assert len(cms.requests) == 2
+
+
+def test_prefetch_negative_caches_codes_missing_from_batch(cms):
+    cms.rows[(DRUGS, "J1100")] = _drug("J1100", 0.12)
+    cms.rows[(DRUGS, "J2001")] = _drug("J2001", 0.05)
+
+    cms.service._prefetch_drug_pricing(["J1100", "J2003", "J9999"])
+    assert len(cms.requests) == 1
+
+    assert cms.service.get_drug_pricing("J1100")["asp_price"] == 0.12
+    # Found through the crosswalk code the batch also asked for
+    assert cms.service.get_drug_pricing("J2003")["original_code"] == "J2001"
+    assert cms.service.get_drug_pricing("J9999") is None
+    assert len(cms.requests) == 1
+
+
+def test_failed_prefetch_falls_back_to_per_code_lookups(cms):
+    cms.rows[(DRUGS, "J1100")] = _drug("J1100", 0.12)
+    cms.batch_down = True
+
+    results = cms.service.get_pricing_for_codes([("J1100", "Dexamethasone injection"), ("J9999", "Injection")])
+
+    assert results["J1100"]["drug_pricing"]["asp_price"] == 0.12
+    assert results["J9999"]["has_data"] is False
+    # The failed batch, then one lookup per code
+    assert len(cms.requests) == 3
+
+    # Per-code answers are cached (J9999 as a negative entry)
+    cms.service.get_pricing_for_codes([("J1100", "Dexamethasone injection"), ("J9999", "Injection")])
+    assert len(cms.requests) == 3
+
+
+@pytest.mark.parametrize("failing", [PHYSICIAN, OUTPATIENT], ids=["physician_down", "outpatient_down"])
+def test_partly_failed_combined_lookup_is_not_cached(cms, failing):
+    cms.rows[(PHYSICIAN, "99284")] = ED_VISIT
+    cms.rows[(OUTPATIENT, "5024")] = ED_FACILITY
+    cms.down.add(failing)
+    pairs = [("99284", "Emergency department visit")]
+
+    partial = cms.service.get_pricing_for_codes(pairs)["99284"]
+    assert partial["has_data"] is True
+    assert (partial["physician_fee"] is None) == (failing == PHYSICIAN)
+    assert (partial["facility_fee"] is None) == (failing == OUTPATIENT)
+
+    cms.down.clear()
+    for service in (cms.service, cms.make_service()):
+        recovered = service.get_pricing_for_codes(pairs)["99284"]
+        assert recovered["physician_fee"]["medicare_payment"]["average"] == 120.0
+        assert recovered["facility_fee"]["facility_payment"]["average"] == 500.0
+
+
+def test_warm_repeat_of_get_pricing_for_codes_makes_no_requests(cms):
+    cms.rows[(PHYSICIAN, "99213")] = OFFICE_VISIT
+    cms.rows[(PHYSICIAN, "99284")] = ED_VISIT
+    cms.rows[(OUTPATIENT, "5024")] = ED_FACILITY
+    cms.rows[(DRUGS, "J1100")] = _drug("J1100", 0.12)
+    pairs = [
+        ("99213", "Office visit, established patient"),
+        ("99284", "Emergency department visit"),
+        ("99212", "Office visit"),  # no CMS data
+        ("J1100", "Dexamethasone injection"),
+        ("J9999", "Injection"),  # no CMS data
+        ("0450", "Emergency room"),  # revenue code, never looked up
+    ]
+
+    cold = cms.service.get_pricing_for_codes(pairs)
+    request_count = len(cms.requests)
+    assert request_count > 0
+    assert cold["99213"]["has_reliable_data"] is True
+    assert cold["99212"]["has_data"] is False
+
+    assert cms.service.get_pricing_for_codes(pairs) == cold
+    # The file cache alone answers a fresh process too
+    assert cms.make_service().get_pricing_for_codes(pairs) == cold
+    assert len(cms.requests) == request_count
@@ -0,0 +1,117 @@
+import io
+
+import pytest
+
+from app.services import pdf_extractor
+
+
+def _make_pdf(pages):
+    """Build a minimal PDF with one Helvetica text line per entry on each page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 14 TL 50 750 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects),)
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def long_bill(tmp_path):
+    pages = [
+        [f"Service {page}-{row} office visit 99213 ${100 + page * 10 + row}.{row:02d} 1" for row in range(6)]
+        for page in range(10)
+    ]
+    pages[0].insert(0, "Duke University Hospital")
+    path = tmp_path / "long_bill.pdf"
+    path.write_bytes(_make_pdf(pages))
+    return str(path)
+
+
+@pytest.fixture
+def page_pool(monkeypatch):
+    """Force the process-pool path, and stop its workers afterwards."""
+    pdf_extractor.shutdown_page_pool()
+    monkeypatch.setattr(pdf_extractor, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_extractor, "PAGE_WORKERS", 3)
+    yield
+    pdf_extractor.shutdown_page_pool()
+
+
+def test_parallel_page_extraction_matches_sequential(long_bill, monkeypatch, page_pool):
+    parallel_texts = []
+    parallel = pdf_extractor.extract_line_items_regex(long_bill, parallel_texts)
+
+    with monkeypatch.context() as m:
+        m.setattr(pdf_extractor, "PAGE_WORKERS", 1)
+        sequential_texts = []
+        sequential = pdf_extractor.extract_line_items_regex(long_bill, sequential_texts)
+
+    assert parallel != pdf_extractor.get_mock_line_items()
+    assert len(parallel) == 60
+    assert parallel == sequential
+    assert parallel_texts == sequential_texts
+    assert len(parallel_texts) == 10
+
+
+def test_parallel_extraction_reuses_one_pool(long_bill, monkeypatch, page_pool):
+    # Regex path only, even where an API key is configured
+    monkeypatch.setattr(pdf_extractor, "LLM_AVAILABLE", False)
+    with open(long_bill, "rb") as f:
+        data = f.read()
+
+    first = pdf_extractor.extract_bill_data(long_bill)
+    pool = pdf_extractor._page_pool
+    assert pool is not None
+
+    second = pdf_extractor.extract_line_items_regex(io.BytesIO(data))
+    assert pdf_extractor._page_pool is pool
+    assert second == first["line_items"]
+    assert first["detected_hospital"]["hospital_id"] == "duke_main"
+
+    pdf_extractor.shutdown_page_pool()
+    assert pdf_extractor._page_pool is None
+
+
+def test_max_items_skips_pages_and_reports_truncation(long_bill, monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "PAGE_WORKERS", 1)
+    stats = {}
+    page_texts = []
+    items = pdf_extractor.extract_line_items_regex(long_bill, page_texts, max_items=20, stats=stats)
+
+    # Stops on the page that reaches the limit (6 items per page)
+    assert len(items) == 24
+    assert len(page_texts) == 4
+    assert stats["truncated"] is True
+
+
+def test_max_items_keeps_pages_already_parsed_in_pool(long_bill, page_pool):
+    stats = {}
+    items = pdf_extractor.extract_line_items_regex(long_bill, max_items=20, stats=stats)
+
+    assert len(items) == 60
+    assert stats["truncated"] is False
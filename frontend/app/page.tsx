@@ -84,6 +84,7 @@ interface DetectedHospital {
 interface ExtractResponse {
   line_items: LineItem[];
   detected_hospital?: DetectedHospital;
+  truncated?: boolean;
 }
 
 type Step = "upload" | "review" | "hospital" | "results";